@@ -0,0 +1,105 @@
+import argparse
+import time
+
+import pygame
+
+from simulation import Simulation, HUNTER, PREY
+from spatial_hash import SpatialHash
+from square import Square, RED, GREEN
+
+
+def build_simulation(num_hunters, num_preys, seed):
+    simulation = Simulation(num_hunters + num_preys, seed=seed)
+    simulation.spawn(HUNTER, num_hunters)
+    simulation.spawn(PREY, num_preys)
+    return simulation
+
+
+def build_world(num_hunters, num_preys, seed):
+    """Create per-sprite Squares (the original game.py path) in the same state as build_simulation."""
+    simulation = build_simulation(num_hunters, num_preys, seed)
+    all_sprites = pygame.sprite.Group()
+    hunters = pygame.sprite.Group()
+    preys = pygame.sprite.Group()
+    for index in range(simulation.count):
+        is_hunter = simulation.team[index] == HUNTER
+        square = Square(RED if is_hunter else GREEN, int(simulation.x[index]), int(simulation.y[index]))
+        square.speed_x = int(simulation.speed_x[index])
+        square.speed_y = int(simulation.speed_y[index])
+        all_sprites.add(square)
+        (hunters if is_hunter else preys).add(square)
+    return all_sprites, hunters, preys
+
+
+def brute_force_collisions(hunters, preys):
+    caught = 0
+    for hunter in hunters:
+        collisions = pygame.sprite.spritecollide(hunter, preys, True)
+        if collisions:
+            caught += len(collisions)
+            hunter.grow_and_speed_up()
+    return caught
+
+
+def spatial_hash_collisions(hunters, preys, grid):
+    caught = 0
+    grid.rebuild(preys)
+    for hunter in hunters:
+        collisions = grid.spritecollide(hunter, True)
+        if collisions:
+            caught += len(collisions)
+            hunter.grow_and_speed_up()
+    return caught
+
+
+def run(num_hunters, num_preys, frames, path, seed=0):
+    """Return (mean collision ms per frame, mean frame ms, preys caught) for one path."""
+    if path == "simulation":
+        simulation = build_simulation(num_hunters, num_preys, seed)
+        update = simulation.update
+
+        def collide():
+            return sum(caught for _, caught in simulation.capture())
+    else:
+        all_sprites, hunters, preys = build_world(num_hunters, num_preys, seed)
+        grid = SpatialHash()
+        update = all_sprites.update
+
+        def collide():
+            if path == "grid":
+                return spatial_hash_collisions(hunters, preys, grid)
+            return brute_force_collisions(hunters, preys)
+
+    collision_time = frame_time = 0.0
+    caught = 0
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        update()
+        collision_start = time.perf_counter()
+        caught += collide()
+        end = time.perf_counter()
+        collision_time += end - collision_start
+        frame_time += end - frame_start
+    return collision_time / frames * 1000, frame_time / frames * 1000, caught
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare collision and update paths headlessly.")
+    parser.add_argument("--preys", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--hunter-ratio", type=float, default=0.2, help="Hunters per prey (game.py uses 3/15)")
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    paths = ("brute", "grid", "simulation")
+    print(f"{'preys':>7} {'hunters':>8} " + " ".join(f"{path + ' ms':>15} {'frame':>8}" for path in paths))
+    for num_preys in args.preys:
+        num_hunters = max(1, int(num_preys * args.hunter_ratio))
+        results = [run(num_hunters, num_preys, args.frames, path) for path in paths]
+        # Every path starts from the same state, so they must capture exactly the same preys
+        assert len({caught for _, _, caught in results}) == 1, results
+        print(f"{num_preys:>7} {num_hunters:>8} " +
+              " ".join(f"{collision_ms:>15.2f} {frame_ms:>8.2f}" for collision_ms, frame_ms, _ in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,143 +1,82 @@
-import time
+import argparse
 import pygame
-import random
-
-# Initialize pygame
-pygame.init()
-
-# Define colors
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-
-# Define window size
-WIDTH = 800
-HEIGHT = 600
-
-HUNTERS = 3
-PREYS = 15
-
-# Create the window
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Hunters vs Prey")
-
-
-# Define the class for the characters (squares)
-class Square(pygame.sprite.Sprite):
-    def __init__(self, color, x, y):
-        super().__init__()
-        self.size = 20
-        self.image = pygame.Surface([20, 20])
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.speed_x = random.randint(-3, 3)
-        self.speed_y = random.randint(-3, 3)
-        self.color = color  # Store the color for later
-
-    def update(self):
-        # Movement in any direction
-        self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
-
-        # Bounce off the edges
-        if self.rect.right > WIDTH or self.rect.left < 0:
-            self.speed_x *= -1
-        if self.rect.bottom > HEIGHT or self.rect.top < 0:
-            self.speed_y *= -1
-
-    def grow_and_speed_up(self):
-        self.size += 2
-        self.image = pygame.Surface([self.size, self.size])
-        self.image.fill(self.color)
-        self.rect = self.image.get_rect(center=self.rect.center)
-
-        # Increase speed
-        if self.speed_x > 0:
-            self.speed_x += 1
-        else:
-            self.speed_x -= 1
-
-        if self.speed_y > 0:
-            self.speed_y += 1
-        else:
-            self.speed_y -= 1
-
-    def speed_up_slightly(self):
-        # Slightly increase the speed (small increment)
-        if self.speed_x > 0:
-            self.speed_x += 0.2
-        else:
-            self.speed_x -= 0.2
-
-        if self.speed_y > 0:
-            self.speed_y += 0.2
-        else:
-            self.speed_y -= 0.2
-
-
-# Create sprite groups
-all_sprites = pygame.sprite.Group()
-hunters = pygame.sprite.Group()
-preys = pygame.sprite.Group()
-
-# Create hunters (red)
-for i in range(HUNTERS):  # Adjust the number of hunters here
-    x = random.randint(0, WIDTH - 20)
-    y = random.randint(0, HEIGHT - 20)
-    hunter = Square(RED, x, y)
-    all_sprites.add(hunter)
-    hunters.add(hunter)
-
-# Create prey (green)
-for i in range(PREYS):  # Adjust the number of prey here
-    x = random.randint(0, WIDTH - 20)
-    y = random.randint(0, HEIGHT - 20)
-    prey_item = Square(GREEN, x, y)
-    all_sprites.add(prey_item)
-    preys.add(prey_item)
 
-# Main loop
-running = True
-clock = pygame.time.Clock()
-start_time = time.time()
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
+from renderer import Renderer
+from simulation import Simulation, SquareView, HUNTER, PREY
+from square import WHITE, WIDTH, HEIGHT, HUNTERS, PREYS
+
+# Redraw and flip the whole window every frame instead of only the regions that changed
+FULL_REDRAW = False
+
+# Square speeds are in pixels per simulation tick
+TICK_RATE = 60
+RENDER_RATE = 60
+
+# Preys speed up slightly every 5 seconds of simulated time
+SPEED_UP_TICKS = 5 * TICK_RATE
+
+# Ticks simulated by --headless when --max-ticks is not given (10 minutes of game time)
+HEADLESS_MAX_TICKS = 10 * 60 * TICK_RATE
+
+parser = add_loop_arguments(argparse.ArgumentParser(description="Hunters vs Prey"), TICK_RATE, RENDER_RATE)
+parser.add_argument("--max-ticks", type=int, default=None,
+                    help=f"Simulation ticks before quitting (with --headless, {HEADLESS_MAX_TICKS} by default)")
+args = parser.parse_args()
+
+# Headless runs also stop when some prey is never caught (e.g. hunters with speed 0)
+max_ticks = args.max_ticks if args.max_ticks is not None or not args.headless else HEADLESS_MAX_TICKS
+
+# Every square lives in the simulation arrays; sprites only draw them
+simulation = Simulation(HUNTERS + PREYS)
+simulation.spawn(HUNTER, HUNTERS)  # Create hunters (red)
+simulation.spawn(PREY, PREYS)  # Create prey (green)
+
 
-while running:
+def update():
+    # Increase prey speed slightly every SPEED_UP_TICKS ticks
+    if loop.ticks > 0 and loop.ticks % SPEED_UP_TICKS == 0:
+        simulation.speed_up_slightly(PREY)
+
+    # Move every square at once
+    simulation.update()
+
+    # Detect collisions between hunters and prey (captured prey are removed, hunters grow and speed up)
+    for hunter, caught in simulation.capture():
+        print(f"A hunter caught {caught} prey!")
+        # You can add more logic here, such as increasing points or changing states
+
+    # Without a window the game ends once every prey has been caught
+    if args.headless and not (simulation.alive & (simulation.team == PREY)).any():
+        loop.stop()
+
+
+def render():
     # Handle events
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
-            running = False
-
-    current_time = time.time()
-    # Check if 5 seconds have passed
-    if current_time - start_time >= 5:
-        # Increase prey speed slightly
-        for prey in preys:
-            prey.speed_up_slightly()
-        # Reset timer
-        start_time = current_time
-
-    # Update sprites
+            loop.stop()
+
+    # Sync the sprites with the simulation, then redraw and update only the regions that changed
     all_sprites.update()
+    renderer.draw(all_sprites)
 
-    # Detect collisions between hunters and prey
-    for hunter in hunters:
-        collisions = pygame.sprite.spritecollide(hunter, preys, True)  # True removes the prey after collision
-        if collisions:
-            print(f"A hunter caught {len(collisions)} prey!")
-            hunter.grow_and_speed_up()
-            # You can add more logic here, such as increasing points or changing states
 
-    # Draw white background and the sprites
-    screen.fill(WHITE)
-    all_sprites.draw(screen)
+loop = FixedTimestepLoop(update, render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                         headless=args.headless)
 
-    # Update display
-    pygame.display.flip()
+if not args.headless:
+    # Initialize pygame and create the window
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Hunters vs Prey")
 
-    # Control update speed (FPS)
-    clock.tick(60)
+    all_sprites = pygame.sprite.RenderUpdates(SquareView(simulation, index) for index in range(simulation.count))
+    renderer = Renderer(screen, WHITE, full_redraw=FULL_REDRAW)
+
+# Main loop
+loop.run(max_ticks=max_ticks)
+print(f"{loop.ticks} ticks simulated, {loop.frames} frames rendered")
 
 # Quit pygame
-pygame.quit()
\ No newline at end of file
+pygame.quit()
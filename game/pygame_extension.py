@@ -0,0 +1,74 @@
+import time
+
+
+class FixedTimestepLoop:
+    """Run a simulation at a fixed tick rate, decoupled from how often it is rendered.
+
+    update() is called exactly once per simulation tick and render() at most render_rate
+    times per second. When the machine can't keep up, renders are skipped first and at
+    most max_frame_skip ticks are run back to back before the loop gives up on catching
+    up (so a slow frame doesn't snowball). In headless mode render() is never called and
+    ticks run back to back as fast as the CPU allows.
+    """
+
+    def __init__(self, update, render=None, tick_rate=60, render_rate=60, headless=False, max_frame_skip=8):
+        self.update = update
+        self.render = render
+        self.tick_time = 1.0 / tick_rate
+        self.render_time = 1.0 / render_rate
+        self.headless = headless or render is None
+        self.max_frame_skip = max_frame_skip
+        self.ticks = 0
+        self.frames = 0
+        self.running = False
+
+    def stop(self):
+        """Finish the loop after the current tick or frame."""
+        self.running = False
+
+    def run(self, max_ticks=None):
+        """Run until stop() is called or max_ticks simulation ticks have passed."""
+        self.running = True
+        if self.headless:
+            while self.running and (max_ticks is None or self.ticks < max_ticks):
+                self.update()
+                self.ticks += 1
+            return
+
+        previous = time.perf_counter()
+        next_render = previous
+        lag = 0.0
+        while self.running and (max_ticks is None or self.ticks < max_ticks):
+            now = time.perf_counter()
+            lag += now - previous
+            previous = now
+
+            # Run all the ticks that are due (frame skipping: several ticks per rendered frame)
+            ticks_this_frame = 0
+            while lag >= self.tick_time and ticks_this_frame < self.max_frame_skip and self.running:
+                self.update()
+                self.ticks += 1
+                ticks_this_frame += 1
+                lag -= self.tick_time
+                if max_ticks is not None and self.ticks >= max_ticks:
+                    break
+            if ticks_this_frame == self.max_frame_skip:
+                lag = 0.0  # Too far behind: drop the remaining time instead of catching up
+
+            if now >= next_render and self.running:
+                self.render()
+                self.frames += 1
+                next_render = max(next_render + self.render_time, now)
+
+            # Sleep until the next tick or render is due
+            wait = min(self.tick_time - lag, next_render - time.perf_counter())
+            if wait > 0:
+                time.sleep(wait)
+
+
+def add_loop_arguments(parser, tick_rate, render_rate):
+    """Add --headless, --tick-rate and --render-rate options for a FixedTimestepLoop to an argparse parser."""
+    parser.add_argument("--headless", action="store_true", help="No window; simulate as fast as possible")
+    parser.add_argument("--tick-rate", type=float, default=tick_rate, help="Simulation ticks per second")
+    parser.add_argument("--render-rate", type=float, default=render_rate, help="Rendered frames per second")
+    return parser
@@ -0,0 +1,55 @@
+import pygame
+
+
+class SurfaceCache:
+    """Pre-filled square surfaces shared by every sprite with the same (color, size)."""
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def get(self, color, size):
+        key = (tuple(color), size)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface([size, size])
+            surface.fill(color)
+            # Match the display pixel format when there is one, so blits don't convert every frame
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.surfaces[key] = surface
+        return surface
+
+
+surface_cache = SurfaceCache()
+
+
+class Renderer:
+    """Draw a pygame.sprite.RenderUpdates group, pushing only the regions that changed.
+
+    Each frame erases the rects drawn in the previous frame (and those of removed sprites)
+    with the background, draws the sprites again and calls pygame.display.update with the
+    union of old and new rects. With full_redraw=True it fills and flips the whole window
+    every frame instead, like the original loop.
+    """
+
+    def __init__(self, screen, background_color, full_redraw=False):
+        self.screen = screen
+        self.full_redraw = full_redraw
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(background_color)
+
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def draw(self, sprites):
+        """Draw the sprites and return the rects pushed to the display (None after a full redraw)."""
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+            sprites.draw(self.screen)
+            pygame.display.flip()
+            return None
+
+        sprites.clear(self.screen, self.background)
+        dirty_rects = sprites.draw(self.screen)
+        pygame.display.update(dirty_rects)
+        return dirty_rects
@@ -0,0 +1,144 @@
+import numpy as np
+import pygame
+
+from renderer import surface_cache
+from spatial_hash import ArraySpatialHash
+from square import WIDTH, HEIGHT, RED, GREEN
+
+HUNTER = 0
+PREY = 1
+
+TEAM_COLORS = {HUNTER: RED, PREY: GREEN}
+
+
+class Simulation:
+    """Positions, velocities, sizes and team of every square in contiguous NumPy arrays.
+
+    Movement, edge bounce, speed-ups, growth and captures run as a few vectorized operations
+    over all entities per tick. Captured squares are only flagged in `alive`, so indices stay
+    stable for the sprites that draw them.
+    """
+
+    def __init__(self, capacity, width=WIDTH, height=HEIGHT, seed=None):
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.speed_x = np.zeros(capacity, dtype=np.float64)
+        self.speed_y = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.team = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.grid = ArraySpatialHash(width, height)
+
+    def spawn(self, team, count):
+        """Add count squares of a team at random positions with random speeds, returning their indices."""
+        start, end = self.count, self.count + count
+        if end > self.x.size:
+            raise ValueError(f"Simulation capacity {self.x.size} exceeded")
+        self.x[start:end] = self.rng.integers(0, self.width - 20, count, endpoint=True)
+        self.y[start:end] = self.rng.integers(0, self.height - 20, count, endpoint=True)
+        self.speed_x[start:end] = self.rng.integers(-3, 3, count, endpoint=True)
+        self.speed_y[start:end] = self.rng.integers(-3, 3, count, endpoint=True)
+        self.size[start:end] = 20
+        self.team[start:end] = team
+        self.alive[start:end] = True
+        self.count = end
+        return np.arange(start, end)
+
+    def update(self):
+        """Move every square and bounce the ones that left the window."""
+        n = self.count
+        x, y, size = self.x[:n], self.y[:n], self.size[:n]
+        x += self.speed_x[:n]
+        y += self.speed_y[:n]
+
+        # Bounce off the edges
+        self.speed_x[:n][(x + size > self.width) | (x < 0)] *= -1
+        self.speed_y[:n][(y + size > self.height) | (y < 0)] *= -1
+
+    def _speed_up(self, indices, amount):
+        """Add amount to the magnitude of both speed components (a zero speed becomes negative)."""
+        speed_x, speed_y = self.speed_x[indices], self.speed_y[indices]
+        self.speed_x[indices] = np.where(speed_x > 0, speed_x + amount, speed_x - amount)
+        self.speed_y[indices] = np.where(speed_y > 0, speed_y + amount, speed_y - amount)
+
+    def speed_up_slightly(self, team):
+        """Slightly increase the speed of every alive square of a team."""
+        self._speed_up(np.flatnonzero(self.alive[:self.count] & (self.team[:self.count] == team)), 0.2)
+
+    def grow_and_speed_up(self, indices):
+        """Grow squares by 2 pixels around their center and increase their speed."""
+        self.size[indices] += 2
+        self.x[indices] -= 1
+        self.y[indices] -= 1
+        self._speed_up(indices, 1)
+
+    def capture(self):
+        """Let every hunter catch the preys it overlaps.
+
+        Matches running pygame.sprite.spritecollide(hunter, preys, True) for each hunter in
+        index order: a prey overlapped by several hunters goes to the first one. Returns a
+        list of (hunter_index, caught) for the hunters that caught something.
+        """
+        n = self.count
+        alive, team = self.alive[:n], self.team[:n]
+        prey_indices = np.flatnonzero(alive & (team == PREY))
+        hunter_indices = np.flatnonzero(alive & (team == HUNTER))
+        if prey_indices.size == 0 or hunter_indices.size == 0:
+            return []
+        self.grid.rebuild(self.x[prey_indices], self.y[prey_indices], int(self.size[prey_indices].max()))
+
+        left, top, size = self.x[hunter_indices], self.y[hunter_indices], self.size[hunter_indices]
+        queries, entities = self.grid.candidate_pairs(left, top, left + size, top + size)
+        hunters, preys = hunter_indices[queries], prey_indices[entities]
+
+        # Keep the pairs whose rects really overlap
+        x, y, size = self.x, self.y, self.size
+        overlap = ((x[preys] < x[hunters] + size[hunters]) & (x[hunters] < x[preys] + size[preys]) &
+                   (y[preys] < y[hunters] + size[hunters]) & (y[hunters] < y[preys] + size[preys]))
+        hunters, preys = hunters[overlap], preys[overlap]
+        if preys.size == 0:
+            return []
+
+        # Each prey is caught by the first hunter (lowest index) that overlaps it
+        order = np.lexsort((hunters, preys))
+        hunters, preys = hunters[order], preys[order]
+        first = np.ones(preys.size, dtype=bool)
+        first[1:] = preys[1:] != preys[:-1]
+        self.alive[preys[first]] = False
+
+        catchers, caught = np.unique(hunters[first], return_counts=True)
+        self.grow_and_speed_up(catchers)
+        return list(zip(catchers.tolist(), caught.tolist()))
+
+
+class SquareView(pygame.sprite.Sprite):
+    """Thin sprite that draws one entity of a Simulation; it has no state of its own."""
+
+    def __init__(self, simulation, index):
+        super().__init__()
+        self.simulation = simulation
+        self.index = index
+        self.color = TEAM_COLORS[int(simulation.team[index])]
+        self.size = None
+        self.image = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.update()
+
+    def update(self):
+        """Copy position and size from the simulation arrays, and leave the groups once captured."""
+        simulation, index = self.simulation, self.index
+        if not simulation.alive[index]:
+            self.kill()
+            return
+        size = int(simulation.size[index])
+        if size != self.size:
+            self.size = size
+            self.image = surface_cache.get(self.color, size)
+            self.rect.size = (size, size)
+        self.rect.topleft = (int(simulation.x[index]), int(simulation.y[index]))
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform grid broadphase for sprite collisions.
+
+    Each sprite is stored in the cell that contains the top-left corner of its rect, so
+    inserting is a single dict append. Queries widen the searched area by the size of the
+    largest stored sprite, which guarantees that every overlapping rect is found.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.max_size = 0
+
+    def rebuild(self, sprites):
+        """Clear the grid and insert every sprite from its current rect."""
+        cell_size = self.cell_size
+        cells = self.cells = defaultdict(list)
+        max_size = 0
+        for sprite in sprites:
+            rect = sprite.rect
+            cells[(rect.x // cell_size, rect.y // cell_size)].append(sprite)
+            max_size = max(max_size, rect.width, rect.height)
+        self.max_size = max_size
+
+    def candidates(self, rect):
+        """Yield the sprites stored in the cells that could overlap rect."""
+        cell_size = self.cell_size
+        cells = self.cells
+        for cell_x in range((rect.left - self.max_size) // cell_size, rect.right // cell_size + 1):
+            for cell_y in range((rect.top - self.max_size) // cell_size, rect.bottom // cell_size + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    yield from cell
+
+    def spritecollide(self, sprite, dokill):
+        """Same contract as pygame.sprite.spritecollide, restricted to neighbouring cells."""
+        collide = sprite.rect.colliderect
+        # alive() skips sprites already killed by another hunter in this frame
+        collisions = [other for other in self.candidates(sprite.rect) if other.alive() and collide(other.rect)]
+        if dokill:
+            for other in collisions:
+                other.kill()
+        return collisions
+
+
+class ArraySpatialHash:
+    """Same broadphase as SpatialHash for entities whose positions live in NumPy arrays.
+
+    Entities are binned by the cell of their top-left corner and sorted by cell key, so
+    the whole rebuild is one argsort, and the candidates of many query rectangles are
+    gathered at once. Cells are clamped to the window, which keeps squares that are
+    briefly outside it (before bouncing back) in the border cells.
+    """
+
+    def __init__(self, width, height, cell_size=64):
+        self.cell_size = cell_size
+        self.columns = width // cell_size + 1
+        self.rows = height // cell_size + 1
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_starts = np.zeros(self.rows * self.columns + 1, dtype=np.intp)
+        self.max_size = 0
+
+    def _cells(self, values, count):
+        return np.clip(np.floor_divide(values, self.cell_size).astype(np.intp), 0, count - 1)
+
+    def rebuild(self, x, y, max_size):
+        """Bin the entities at (x, y); max_size is the largest width or height among them."""
+        keys = self._cells(y, self.rows) * self.columns + self._cells(x, self.columns)
+        self.order = np.argsort(keys, kind='stable')
+        # cell_starts[k]:cell_starts[k + 1] is the slice of order stored in cell k
+        self.cell_starts = np.searchsorted(keys[self.order], np.arange(self.rows * self.columns + 1))
+        self.max_size = max_size
+
+    def candidate_pairs(self, left, top, right, bottom):
+        """Pairs (query, entity) for every entity that could overlap each query rectangle.
+
+        left, top, right and bottom are arrays with one query rectangle per element; the
+        returned entity positions refer to the arrays given to rebuild.
+        """
+        first_column, last_column = self._cells(left - self.max_size, self.columns), self._cells(right, self.columns)
+        first_row, last_row = self._cells(top - self.max_size, self.rows), self._cells(bottom, self.rows)
+
+        # Every (query, cell) combination inside the query ranges
+        column_offsets = np.arange((last_column - first_column).max(initial=0) + 1)
+        row_offsets = np.arange((last_row - first_row).max(initial=0) + 1)
+        columns = first_column[:, None, None] + column_offsets[None, None, :]
+        rows = first_row[:, None, None] + row_offsets[None, :, None]
+        inside = (columns <= last_column[:, None, None]) & (rows <= last_row[:, None, None])
+        keys = (rows * self.columns + columns)[inside]
+        queries = np.broadcast_to(np.arange(left.size)[:, None, None], inside.shape)[inside]
+
+        # Expand each cell into the entities stored in it
+        starts = self.cell_starts[keys]
+        counts = self.cell_starts[keys + 1] - starts
+        total = counts.sum()
+        first_pair = np.repeat(np.cumsum(counts) - counts, counts)
+        entities = self.order[np.repeat(starts, counts) + np.arange(total) - first_pair]
+        return np.repeat(queries, counts), entities
@@ -1,6 +1,8 @@
 import pygame
 import random
 
+from renderer import surface_cache
+
 
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
@@ -18,8 +20,7 @@ class Square(pygame.sprite.Sprite):
     def __init__(self, color, x, y):
         super().__init__()
         self.size = 20
-        self.image = pygame.Surface([20, 20])
-        self.image.fill(color)
+        self.image = surface_cache.get(color, 20)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -40,8 +41,7 @@ class Square(pygame.sprite.Sprite):
 
     def grow_and_speed_up(self):
         self.size += 2
-        self.image = pygame.Surface([self.size, self.size])
-        self.image.fill(self.color)
+        self.image = surface_cache.get(self.color, self.size)
         self.rect = self.image.get_rect(center=self.rect.center)
 
         # Increase speed
@@ -0,0 +1,85 @@
+import multiprocessing as mp
+
+import numpy as np
+
+# Fotogramas por segundo máximos del visor
+VIEWER_FPS = 30
+
+
+def _viewer(buffer, sequence, running, layout, caption, fps):
+    """Bucle del proceso visor: dibujar la última instantánea completa a su propio ritmo."""
+    import pygame
+
+    from rendering import Renderer, draw_agents
+
+    positions = np.frombuffer(buffer, dtype=np.float32).reshape(-1, 2)
+    frame = np.empty_like(positions)
+    groups = {name: frame[start:stop] for name, (start, stop) in layout.items()}
+    renderer = Renderer("human", caption=caption)
+    surface = renderer.get_surface()
+    clock = pygame.time.Clock()
+    shown = -1
+    while running.value:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running.value = 0
+        # Seqlock: un número impar indica que el entrenamiento está escribiendo; si cambia
+        # durante la copia la instantánea está a medias y se espera a la siguiente
+        before = sequence.value
+        if before != shown and before % 2 == 0:
+            frame[:] = positions
+            if sequence.value == before:
+                shown = before
+                draw_agents(surface, groups)
+                renderer.present()
+        clock.tick(fps)
+    renderer.close()
+
+
+class AsyncRenderer:
+    """Ventana de Pygame en un proceso aparte que muestra las posiciones que le envía el entrenamiento.
+
+    push() copia las posiciones por grupo (el dict de agent_positions()) en memoria compartida
+    y vuelve enseguida: no espera al visor ni toma ningún lock. El visor dibuja a fps la última
+    instantánea completa, así que si va por detrás se salta las intermedias. Cerrar la ventana
+    solo para el visor; los push siguientes se ignoran.
+
+    layout es un agent_positions() de ejemplo: fija los grupos y su número de agentes.
+    """
+
+    def __init__(self, layout, caption="Entrenamiento", fps=VIEWER_FPS, start_method=None):
+        self.layout = {}
+        count = 0
+        for name, positions in layout.items():
+            self.layout[name] = (count, count + len(positions))
+            count += len(positions)
+
+        ctx = mp.get_context(start_method)
+        self.buffer = ctx.RawArray("f", count * 2)
+        self.positions = np.frombuffer(self.buffer, dtype=np.float32).reshape(count, 2)
+        self.sequence = ctx.RawValue("Q", 0)
+        self.running = ctx.RawValue("b", 1)
+        self.process = ctx.Process(target=_viewer, daemon=True,
+                                   args=(self.buffer, self.sequence, self.running, self.layout, caption, fps))
+        self.process.start()
+
+    @property
+    def is_open(self):
+        return bool(self.running.value)
+
+    def push(self, agent_positions):
+        """Publicar una instantánea sin bloquear; devuelve False si el visor ya está cerrado."""
+        if not self.running.value:
+            return False
+        sequence = self.sequence.value
+        self.sequence.value = sequence + 1
+        for name, (start, stop) in self.layout.items():
+            self.positions[start:stop] = agent_positions[name]
+        self.sequence.value = sequence + 2
+        return True
+
+    def close(self):
+        self.running.value = 0
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,270 @@
+import argparse
+import contextlib
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from hunter_prey import PreyHunterEnv
+from hunter_prey_vec import PreyHunterVecEnv
+from hunters import HunterPreyEnv
+from preys import PreyEnv
+
+# La simulación del juego vive en game/
+import game_path  # noqa: F401
+from simulation import Simulation, HUNTER, PREY
+
+# Barridos de parámetros por caso; --quick usa solo el primer valor de cada uno
+SWEEPS = {
+    "PreyHunterEnv": {},
+    "PreyHunterVecEnv": {"num_envs": [1, 64, 1024]},
+    "PreyHunterSwarm": {"team_size": [100, 1000, 4000]},
+    "HunterPreyEnv": {"num_preys": [5, 50, 500], "num_obstacles": [2, 20, 200]},
+    "PreyEnv": {"num_hunters": [5, 50, 500], "num_obstacles": [2, 20, 200]},
+    "GameSimulation": {"entities": [1000, 10000, 50000]},
+}
+
+# Métricas que compara --compare: si mayor es mejor y el empeoramiento absoluto que se ignora
+# además de la tolerancia relativa (para que pasar de 0 a casi 0 no cuente como regresión)
+METRICS = {
+    "steps_per_sec": (True, 0.0),
+    "reset_ms": (False, 0.0),
+    "alloc_peak_bytes_per_step": (False, 64.0),
+    "retained_blocks_per_step": (False, 0.5),
+}
+
+
+class GymCase:
+    """Adaptador para medir un gym.Env con acciones aleatorias pregeneradas."""
+
+    def __init__(self, env, seed=0):
+        self.env = env
+        self.seed = seed
+        env.action_space.seed(seed)
+        self.actions = [env.action_space.sample() for _ in range(1024)]
+        self.index = 0
+        self.steps_per_call = 1
+
+    def reset(self):
+        # Solo la primera vez con semilla: el resto de la ejecución es igual de repetible y
+        # el coste de reset medido no incluye crear un Generator nuevo
+        self.env.reset(seed=self.seed)
+        self.seed = None
+
+    def step(self):
+        self.index = (self.index + 1) % len(self.actions)
+        _, _, terminated, truncated, _ = self.env.step(self.actions[self.index])
+        if terminated or truncated:
+            self.env.reset()
+
+
+class VecCase:
+    """Adaptador para un VecEnv: cada llamada avanza num_envs pasos de entorno."""
+
+    def __init__(self, env, seed=0):
+        self.env = env
+        rng = np.random.default_rng(seed)
+        self.actions = [rng.integers(0, 4, (env.num_envs, env.action_space.shape[0])) for _ in range(64)]
+        self.index = 0
+        self.steps_per_call = env.num_envs
+
+    def reset(self):
+        self.env.reset()
+
+    def step(self):
+        self.index = (self.index + 1) % len(self.actions)
+        self.env.step(self.actions[self.index])
+
+
+class SimulationCase:
+    """Adaptador para la simulación del juego: cada tick mueve y resuelve capturas de todas las entidades."""
+
+    def __init__(self, entities, seed=0):
+        self.entities = entities
+        self.seed = seed
+        self.steps_per_call = 1
+        self.reset()
+
+    def reset(self):
+        # Una décima parte de hunters, en un mundo que crece con las entidades para que cubran ~5% del área
+        side = int(np.sqrt(self.entities * 20 * 20 / 0.05))
+        self.simulation = Simulation(self.entities, width=side, height=side, seed=self.seed)
+        self.simulation.spawn(HUNTER, self.entities // 10)
+        self.simulation.spawn(PREY, self.entities - self.entities // 10)
+
+    def step(self):
+        self.simulation.update()
+        self.simulation.capture()
+
+
+def make_case(name, params, jit=False, reuse_obs=False):
+    if name == "PreyHunterEnv":
+        return GymCase(PreyHunterEnv(jit=jit, reuse_obs=reuse_obs, **params))
+    if name == "PreyHunterSwarm":
+        # Equipos grandes con lista de celdas y observación de los 4 rivales más cercanos
+        return GymCase(PreyHunterEnv(num_preys=params["team_size"], num_hunters=params["team_size"],
+                                     cutoff_radius=0.05, k_nearest=4, jit=jit,
+                                     reuse_obs=reuse_obs))
+    if name == "PreyHunterVecEnv":
+        return VecCase(PreyHunterVecEnv(seed=0, jit=jit, reuse_obs=reuse_obs, **params))
+    if name == "HunterPreyEnv":
+        return GymCase(HunterPreyEnv(jit=jit, reuse_obs=reuse_obs, **params))
+    if name == "PreyEnv":
+        return GymCase(PreyEnv(jit=jit, reuse_obs=reuse_obs, **params))
+    if name == "GameSimulation":
+        return SimulationCase(**params)
+    raise ValueError(f"Caso desconocido: {name}")
+
+
+def measure(case, min_time, alloc_steps):
+    """Medir pasos/s, coste de reset y memoria asignada por paso de un caso.
+
+    Python no cuenta cada reserva de memoria, así que con tracemalloc se miden los bytes del
+    pico transitorio de un paso (lo que reserva y libera), y los bloques y bytes que deja
+    reservados, contados comparando una instantánea antes y otra después de los pasos.
+    """
+    np.random.seed(0)  # Para que las partes que usan el RNG global de NumPy sean repetibles
+    case.reset()
+    case.step()  # Calentamiento
+
+    # Pasos por segundo: la mejor de 3 tandas de min_time / 3 segundos, para filtrar ruido del sistema
+    steps_per_sec = 0.0
+    for _ in range(3):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            case.step()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / 3:
+                break
+        steps_per_sec = max(steps_per_sec, calls * case.steps_per_call / elapsed)
+
+    # Coste de reset
+    resets = 0
+    start = time.perf_counter()
+    while resets < 10 or time.perf_counter() - start < min_time / 10:
+        case.reset()
+        resets += 1
+    reset_ms = (time.perf_counter() - start) / resets * 1000
+
+    # Memoria: pico transitorio por paso (lo que el paso reserva y libera) y crecimiento neto (fugas)
+    tracemalloc.start()
+    peaks = np.zeros(alloc_steps)
+    # Sin las reservas de tracemalloc y de este fichero (las instantáneas y el bucle de medida)
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    gc.collect()  # Que la basura anterior no cuente como liberada durante los pasos
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    for index in range(alloc_steps):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        case.step()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[index] = peak - current
+    gc.collect()
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    retained = after.compare_to(before, "lineno")
+
+    return {
+        "steps_per_sec": steps_per_sec,
+        "reset_ms": reset_ms,
+        "alloc_peak_bytes_per_step": float(np.median(peaks)),
+        "retained_blocks_per_step": sum(stat.count_diff for stat in retained) / alloc_steps,
+        "retained_bytes_per_step": sum(stat.size_diff for stat in retained) / alloc_steps,
+    }
+
+
+def run_suite(names, quick, min_time, alloc_steps, jit=False, reuse_obs=False):
+    results = []
+    for name in names:
+        sweep = SWEEPS[name]
+        keys = list(sweep)
+        values = [sweep[key][:1] if quick else sweep[key] for key in keys]
+        for combination in itertools.product(*values):
+            params = dict(zip(keys, combination))
+            # Silenciar los prints del entorno (p. ej. las capturas de HunterPreyEnv)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                metrics = measure(make_case(name, params, jit, reuse_obs), min_time, alloc_steps)
+            results.append({"name": name, "params": params, "jit": jit, "reuse_obs": reuse_obs, **metrics})
+            print(f"{name:<18} {json.dumps(params):<40} {metrics['steps_per_sec']:>12.0f} steps/s "
+                  f"{metrics['reset_ms']:>8.3f} ms/reset {metrics['alloc_peak_bytes_per_step']:>10.0f} B/step "
+                  f"{metrics['retained_blocks_per_step']:>6.2f} blocks/step")
+    return results
+
+
+def result_key(result):
+    # Los resultados de antes de guardar jit y reuse_obs por caso se midieron sin ellos
+    return (result["name"], json.dumps(result["params"], sort_keys=True),
+            result.get("jit", False), result.get("reuse_obs", False))
+
+
+def compare(results, baseline, tolerance):
+    """Devolver las regresiones frente a un baseline: las métricas de METRICS que empeoran más que la tolerancia."""
+    baseline_by_key = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = baseline_by_key.get(result_key(result))
+        if old is None:
+            continue
+        for metric, (higher_is_better, slack) in METRICS.items():
+            if metric not in old:
+                continue
+            if higher_is_better:
+                worse = result[metric] < old[metric] * (1 - tolerance) - slack
+            else:
+                worse = result[metric] > old[metric] * (1 + tolerance) + slack
+            if worse:
+                regressions.append((result, metric, old[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput de los entornos y de la simulación.")
+    parser.add_argument("--cases", nargs="+", choices=sorted(SWEEPS), default=list(SWEEPS))
+    parser.add_argument("--quick", action="store_true", help="Solo el primer valor de cada barrido")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Segundos de medición por caso")
+    parser.add_argument("--alloc-steps", type=int, default=200, help="Pasos medidos con tracemalloc")
+    parser.add_argument("--jit", action="store_true", help="Entornos con los kernels compilados de kernels.py")
+    parser.add_argument("--reuse-obs", action="store_true", help="Entornos que devuelven su buffer de observación sin copiarlo")
+    parser.add_argument("--output", default="benchmark.json", help="Fichero JSON de resultados")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    results = run_suite(args.cases, args.quick, args.min_time, args.alloc_steps, args.jit, args.reuse_obs)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "jit": args.jit,
+            "reuse_obs": args.reuse_obs,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for result, metric, old, new in regressions:
+            print(f"REGRESIÓN {result['name']} {json.dumps(result['params'])}: {metric} {old:.3f} -> {new:.3f}")
+        if regressions:
+            sys.exit(1)
+        print(f"Sin regresiones frente a {args.compare} (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import time
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+from checkpoints import snapshot_model
+from profiling import merge_phase_stats
+
+
+class PhaseProfilerCallback(BaseCallback):
+    """Registrar en el logger de entrenamiento el tiempo por fase de los entornos creados con profile=True.
+
+    Al final de cada rollout escribe, por fase, el tiempo medio por llamada en microsegundos
+    (profile/<fase>/mean_us) y su fracción del tiempo medido (profile/<fase>/share).
+    """
+
+    def _on_step(self) -> bool:
+        return True
+
+    @staticmethod
+    def merged_stats(vec_env):
+        """Estadísticas por fase sumadas de todos los entornos de un VecEnv."""
+        # PreyHunterVecEnv simula todas sus arenas en un solo objeto y expone get_phase_stats directamente
+        get_phase_stats = getattr(vec_env, "get_phase_stats", None)
+        if get_phase_stats is not None:
+            return get_phase_stats()
+        return merge_phase_stats(vec_env.env_method("get_phase_stats"))
+
+    def _on_rollout_end(self) -> None:
+        stats = self.merged_stats(self.training_env)
+        total = sum(phase["total_s"] for phase in stats.values())
+        for name, phase in stats.items():
+            if phase["calls"]:
+                self.logger.record(f"profile/{name}/mean_us", phase["total_s"] / phase["calls"] * 1e6)
+            if total > 0:
+                self.logger.record(f"profile/{name}/share", phase["total_s"] / total)
+
+
+class AsyncRenderCallback(BaseCallback):
+    """Enviar a un AsyncRenderer las posiciones de env.agent_positions() como mucho rate veces por segundo.
+
+    El entrenamiento nunca espera al visor: entre envíos el callback solo mira el reloj.
+    """
+
+    def __init__(self, renderer, env, rate=30.0, verbose=0):
+        super(AsyncRenderCallback, self).__init__(verbose)
+        self.renderer = renderer
+        self.env = env
+        self.interval = 1.0 / rate
+        self.next_push = 0.0
+
+    def _on_step(self) -> bool:
+        now = time.perf_counter()
+        if now >= self.next_push:
+            self.next_push = now + self.interval
+            self.renderer.push(self.env.agent_positions())
+        return True
+
+
+class CpuBudgetCallback(BaseCallback):
+    """Cortar el entrenamiento cuando el proceso ha gastado seconds de CPU (None: sin límite)."""
+
+    def __init__(self, seconds=None, verbose=0):
+        super(CpuBudgetCallback, self).__init__(verbose)
+        self.seconds = seconds
+        self.start = 0.0
+        self.exhausted = False
+
+    def _on_training_start(self) -> None:
+        self.start = time.process_time()
+
+    def _on_step(self) -> bool:
+        if self.seconds is not None and time.process_time() - self.start > self.seconds:
+            self.exhausted = True
+            return False
+        return True
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """Cada every_steps pasos, copiar el modelo en memoria y pasárselo a un CheckpointWriter.
+
+    El entrenamiento solo paga la copia (snapshot_model); la escritura va en el hilo del
+    writer. Si el checkpoint anterior aún se está escribiendo, este se salta. La copia se
+    hace al final de cada rollout: en _on_step SB3 todavía no ha guardado la transición
+    del paso en el replay buffer y se perdería al reanudar.
+    """
+
+    def __init__(self, writer, every_steps, replay_buffer=False, verbose=0):
+        super(AsyncCheckpointCallback, self).__init__(verbose)
+        self.writer = writer
+        self.every_steps = every_steps
+        self.replay_buffer = replay_buffer
+        self.next_checkpoint = 0
+
+    def _on_training_start(self) -> None:
+        # Al reanudar, num_timesteps ya viene del checkpoint
+        self.next_checkpoint = self.num_timesteps + self.every_steps
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        if self.num_timesteps >= self.next_checkpoint and not self.writer.busy.is_set():
+            self.next_checkpoint = self.num_timesteps + self.every_steps
+            self.writer.submit(snapshot_model(self.model, self.replay_buffer))
+
+
+class ParallelEvaluationCallback(BaseCallback):
+    """Cada every_steps pasos, evaluar el modelo con un ParallelEvaluator y registrar la media y su intervalo.
+
+    Los episodios se reparten entre los workers del evaluator y la evaluación para en cuanto
+    la recompensa media es fiable (ver ParallelEvaluator.evaluate); el entrenamiento espera a
+    que termine. Los informes quedan en reports como (pasos, informe).
+    """
+
+    def __init__(self, evaluator, every_steps, verbose=0, **evaluate_kwargs):
+        super(ParallelEvaluationCallback, self).__init__(verbose)
+        self.evaluator = evaluator
+        self.every_steps = every_steps
+        self.evaluate_kwargs = evaluate_kwargs
+        self.next_evaluation = 0
+        self.reports = []
+
+    def _on_training_start(self) -> None:
+        # Al reanudar, num_timesteps ya viene del checkpoint
+        self.next_evaluation = self.num_timesteps + self.every_steps
+
+    def _on_step(self) -> bool:
+        if self.num_timesteps >= self.next_evaluation:
+            self.next_evaluation = self.num_timesteps + self.every_steps
+            report = self.evaluator.evaluate(self.model, **self.evaluate_kwargs)
+            self.reports.append((self.num_timesteps, report))
+            self.logger.record("eval/mean_return", report["mean_return"])
+            self.logger.record("eval/half_width", report["half_width"])
+            self.logger.record("eval/episodes", report["episodes"])
+            self.logger.record("eval/wall_time", report["wall_time"])
+            if self.verbose:
+                print(f"Evaluación a los {self.num_timesteps} pasos: {report['mean_return']:.3f} "
+                      f"+/- {report['half_width']:.3f} en {report['episodes']} episodios")
+        return True
@@ -0,0 +1,191 @@
+import copy
+import os
+import pickle
+import queue
+import random
+import re
+import shutil
+import threading
+import warnings
+
+import numpy as np
+import torch
+from stable_baselines3.common.save_util import recursive_getattr, save_to_pkl, save_to_zip_file
+
+CHECKPOINT_PATTERN = re.compile(r"^step_(\d+)$")
+
+
+def rng_state(model):
+    """Estado de los generadores que usa el entrenamiento (python, numpy, torch y el del action_space)."""
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "action_space": model.action_space.np_random.bit_generator.state,
+    }
+
+
+def set_rng_state(model, state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    model.action_space.np_random.bit_generator.state = state["action_space"]
+
+
+def snapshot_model(model, replay_buffer=False):
+    """Copiar en memoria todo lo que escribe model.save (y opcionalmente el replay buffer).
+
+    Es lo único que se hace en el hilo del entrenamiento: luego el modelo puede seguir
+    aprendiendo mientras CheckpointWriter serializa y comprime la copia.
+    """
+    # Lo mismo que BaseAlgorithm.save, pero copiado en lugar de escrito
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for torch_var in state_dicts_names + torch_variable_names:
+        exclude.add(torch_var.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+    pytorch_variables = {name: recursive_getattr(model, name) for name in torch_variable_names}
+
+    snapshot = {
+        "num_timesteps": model.num_timesteps,
+        "data": copy.deepcopy(data),
+        "params": copy.deepcopy(model.get_parameters()),
+        "pytorch_variables": copy.deepcopy(pytorch_variables),
+        "rng": rng_state(model),
+        "replay_buffer": None,
+    }
+    if replay_buffer and getattr(model, "replay_buffer", None) is not None:
+        # Copia superficial con solo las filas ya llenas de cada array: el buffer reserva
+        # buffer_size filas desde el principio y copiarlas enteras costaría más que guardarlo
+        buffer = copy.copy(model.replay_buffer)
+        filled = buffer.buffer_size if buffer.full else buffer.pos
+        for name, value in vars(model.replay_buffer).items():
+            if isinstance(value, np.ndarray):
+                setattr(buffer, name, value[:filled].copy())
+        snapshot["replay_buffer"] = buffer
+    return snapshot
+
+
+def _restore_buffer_size(buffer):
+    """Devolver a los arrays de un replay buffer recortado por snapshot_model sus buffer_size filas."""
+    for name, value in vars(buffer).items():
+        if isinstance(value, np.ndarray) and len(value) < buffer.buffer_size:
+            full = np.zeros((buffer.buffer_size, *value.shape[1:]), dtype=value.dtype)
+            full[:len(value)] = value
+            setattr(buffer, name, full)
+    return buffer
+
+
+class CheckpointWriter:
+    """Hilo que escribe en disco las instantáneas de snapshot_model y conserva solo las keep últimas.
+
+    Cada checkpoint es un directorio step_<pasos> con model.zip, rng.pkl y, si se pidió,
+    replay_buffer.pkl, con solo las filas llenas (load_checkpoint lo vuelve a ampliar). Se escribe con otro nombre y se renombra al terminar, así que un
+    proceso interrumpido nunca deja un checkpoint a medias. Si llega una instantánea
+    mientras se escribe la anterior, submit devuelve False y no espera.
+    """
+
+    def __init__(self, directory, keep=3):
+        self.directory = directory
+        self.keep = keep
+        self.queue = queue.Queue(maxsize=1)
+        self.busy = threading.Event()
+        self.errors = []
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, snapshot):
+        """Encolar una instantánea sin bloquear; False si todavía se está escribiendo la anterior."""
+        if self.busy.is_set():
+            return False
+        self.busy.set()
+        self.queue.put(snapshot)
+        return True
+
+    def _run(self):
+        while True:
+            snapshot = self.queue.get()
+            if snapshot is None:
+                break
+            try:
+                self._write(snapshot)
+                self._rotate()
+            except Exception as error:  # Un checkpoint fallido no debe tumbar el entrenamiento, pero sí avisar
+                self.errors.append(error)
+                warnings.warn(f"No se pudo escribir el checkpoint de {snapshot['num_timesteps']} pasos: {error!r}",
+                              RuntimeWarning)
+            finally:
+                self.busy.clear()
+
+    def _write(self, snapshot):
+        path = os.path.join(self.directory, f"step_{snapshot['num_timesteps']}")
+        partial = f"{path}.partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        os.makedirs(partial)
+        save_to_zip_file(os.path.join(partial, "model.zip"), data=snapshot["data"], params=snapshot["params"],
+                         pytorch_variables=snapshot["pytorch_variables"])
+        with open(os.path.join(partial, "rng.pkl"), "wb") as file:
+            pickle.dump(snapshot["rng"], file)
+        if snapshot["replay_buffer"] is not None:
+            save_to_pkl(os.path.join(partial, "replay_buffer.pkl"), snapshot["replay_buffer"])
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(partial, path)
+
+    def _rotate(self):
+        for path in list_checkpoints(self.directory)[:-self.keep]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def close(self):
+        """Esperar a que termine el checkpoint en curso y parar el hilo; error si algún checkpoint falló."""
+        self.queue.put(None)
+        self.thread.join()
+        if self.errors:
+            raise RuntimeError(f"Fallaron {len(self.errors)} checkpoints en {self.directory}") from self.errors[-1]
+
+
+def list_checkpoints(directory):
+    """Checkpoints completos de un directorio, del más antiguo al más reciente."""
+    if not os.path.isdir(directory):
+        return []
+    steps = [(int(match.group(1)), name) for name in os.listdir(directory)
+             if (match := CHECKPOINT_PATTERN.match(name))]
+    return [os.path.join(directory, name) for _, name in sorted(steps)]
+
+
+def load_checkpoint(algo, path, env):
+    """Cargar un checkpoint (o el último de un directorio de checkpoints) para seguir entrenando.
+
+    Restaura el modelo con su optimizador y su contador de pasos, el replay buffer si se
+    guardó y el estado de los generadores aleatorios. El entorno no se guarda, así que el
+    episodio en curso vuelve a empezar. Para terminar el entrenamiento original, continuar
+    con model.learn(total - model.num_timesteps, reset_num_timesteps=False).
+    """
+    if not os.path.exists(os.path.join(path, "model.zip")):
+        checkpoints = list_checkpoints(path)
+        if not checkpoints:
+            raise FileNotFoundError(f"No hay checkpoints en {path}")
+        path = checkpoints[-1]
+    model = algo.load(os.path.join(path, "model.zip"), env=env)
+    replay_buffer = os.path.join(path, "replay_buffer.pkl")
+    if os.path.exists(replay_buffer):
+        model.load_replay_buffer(replay_buffer)
+        _restore_buffer_size(model.replay_buffer)  # Se guardó solo con las filas llenas
+    with open(os.path.join(path, "rng.pkl"), "rb") as file:
+        set_rng_state(model, pickle.load(file))
+    # Sin última observación, learn reinicia el entorno en lugar de seguir un episodio que no existe
+    model._last_obs = None
+    return model
+
+
+def add_checkpoint_arguments(parser, directory, every_steps=2000):
+    """Añadir a un parser de argparse las opciones de checkpoints periódicos y de reanudación."""
+    parser.add_argument("--checkpoint-dir", default=directory, help="Directorio de checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=every_steps, help="Pasos entre checkpoints (0 para ninguno)")
+    parser.add_argument("--keep-checkpoints", type=int, default=3, help="Checkpoints que se conservan")
+    parser.add_argument("--save-replay-buffer", action="store_true", help="Incluir el replay buffer en los checkpoints")
+    parser.add_argument("--resume", nargs="?", const="", default=None, metavar="CHECKPOINT",
+                        help="Seguir desde un checkpoint (por defecto el último de --checkpoint-dir)")
+    return parser
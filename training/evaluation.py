@@ -0,0 +1,151 @@
+import argparse
+import functools
+import time
+from statistics import NormalDist
+
+import numpy as np
+from gymnasium.wrappers import TimeLimit
+
+from shared_memory_vec_env import SharedMemoryVecEnv
+from train import ALGOS, ENVS
+
+
+def make_eval_env(env_name, max_episode_steps, **env_kwargs):
+    """Entorno sin render con límite de pasos: sin él un episodio de una política mala no termina nunca."""
+    return TimeLimit(ENVS[env_name](**env_kwargs), max_episode_steps=max_episode_steps)
+
+
+def confidence_half_width(values, confidence=0.95):
+    """Semiancho del intervalo de confianza (normal) de la media de values."""
+    if len(values) < 2:
+        return float("inf")
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    return float(z * np.std(values, ddof=1) / np.sqrt(len(values)))
+
+
+class ParallelEvaluator:
+    """Evaluar políticas en un pool de procesos con entornos sin render, parando cuando la media es fiable.
+
+    Cada paso pide las acciones de todos los workers con un único predict por lotes. Tras
+    min_episodes episodios la evaluación termina en cuanto el intervalo de confianza de la
+    recompensa media tiene un semiancho menor que tolerance * |media| (o que atol), o al
+    llegar a max_episodes. Los episodios cortos acaban antes, así que para no sesgar la
+    media solo cuentan los episodios en el orden en que empezaron: el primero sin terminar
+    corta la lista.
+
+    El pool se crea una vez y sirve para todas las evaluaciones (p. ej. entre checkpoints).
+    """
+
+    def __init__(self, env_name, workers=4, max_episode_steps=1000, **env_kwargs):
+        # Los workers copian cada observación a memoria compartida: el entorno no necesita copiarla antes
+        env_fn = functools.partial(make_eval_env, env_name, max_episode_steps, reuse_obs=True, **env_kwargs)
+        self.env = SharedMemoryVecEnv([env_fn for _ in range(workers)])
+
+    def evaluate(self, policy, min_episodes=10, max_episodes=200, confidence=0.95, tolerance=0.05, atol=0.0,
+                 deterministic=True, seed=None):
+        """Evaluar policy (cualquier objeto con el predict de SB3) y devolver un informe por episodio.
+
+        El informe es un dict con mean_return, half_width, episodes, returns, lengths, captures
+        y seconds (listas por episodio) y wall_time, el tiempo total de la evaluación.
+        """
+        num_envs = self.env.num_envs
+        start = time.perf_counter()
+        if seed is not None:
+            self.env.seed(seed)
+        obs = self.env.reset()
+
+        # Episodio (en orden de inicio) que juega cada worker y sus acumulados
+        running = np.arange(num_envs)
+        next_episode = num_envs
+        returns = np.zeros(num_envs)
+        lengths = np.zeros(num_envs, dtype=np.int64)
+        captures = np.zeros(num_envs, dtype=np.int64)
+        started = np.full(num_envs, start)
+        finished = {}
+        completed = 0  # episodios seguidos terminados desde el primero
+        half_width = float("inf")
+        while True:
+            actions, _ = policy.predict(obs, deterministic=deterministic)
+            obs, rewards, dones, infos = self.env.step(actions)
+            returns += rewards
+            lengths += 1
+            for index, info in enumerate(infos):
+                # Los entornos que no cuentan capturas terminan justo al capturar
+                terminated = dones[index] and not info.get("TimeLimit.truncated", False)
+                captures[index] += info.get("captures", int(terminated))
+
+            done_indices = np.flatnonzero(dones)
+            if not done_indices.size:
+                continue
+            now = time.perf_counter()
+            for index in done_indices:
+                finished[running[index]] = (returns[index], lengths[index], captures[index], now - started[index])
+                running[index] = next_episode
+                next_episode += 1
+                returns[index] = lengths[index] = captures[index] = 0
+                started[index] = now
+            while completed in finished:
+                completed += 1
+
+            if completed >= min_episodes:
+                episode_returns = [finished[episode][0] for episode in range(completed)]
+                mean_return = float(np.mean(episode_returns))
+                half_width = confidence_half_width(episode_returns, confidence)
+                if half_width <= max(tolerance * abs(mean_return), atol) or completed >= max_episodes:
+                    break
+
+        episodes = [finished[episode] for episode in range(min(completed, max_episodes))]
+        episode_returns, episode_lengths, episode_captures, episode_seconds = (list(column) for column in zip(*episodes))
+        return {
+            "mean_return": float(np.mean(episode_returns)),
+            "half_width": confidence_half_width(episode_returns, confidence),
+            "episodes": len(episodes),
+            "returns": [float(value) for value in episode_returns],
+            "lengths": [int(value) for value in episode_lengths],
+            "captures": [int(value) for value in episode_captures],
+            "seconds": [float(value) for value in episode_seconds],
+            "wall_time": time.perf_counter() - start,
+        }
+
+    def close(self):
+        self.env.close()
+
+
+def format_report(report):
+    """Resumen de una línea de un informe de ParallelEvaluator.evaluate."""
+    return (f"Recompensa media {report['mean_return']:.3f} +/- {report['half_width']:.3f} "
+            f"en {report['episodes']} episodios (longitud media {np.mean(report['lengths']):.1f}, "
+            f"{np.mean(report['captures']):.2f} capturas por episodio) en {report['wall_time']:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluar un modelo en paralelo hasta que su recompensa media sea fiable.")
+    parser.add_argument("model", help="Modelo de SB3 (.zip) o política exportada con numpy_policy.py (.npz)")
+    parser.add_argument("--algo", choices=sorted(ALGOS), default="dqn")
+    parser.add_argument("--env", choices=sorted(ENVS), default="hunters")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--min-episodes", type=int, default=10)
+    parser.add_argument("--max-episodes", type=int, default=200)
+    parser.add_argument("--max-episode-steps", type=int, default=1000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Semiancho máximo del intervalo de confianza relativo a la media")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.model.endswith(".npz"):
+        from numpy_policy import NumpyPolicy
+
+        policy = NumpyPolicy.load(args.model)
+    else:
+        policy = ALGOS[args.algo].load(args.model, device="cpu")
+
+    evaluator = ParallelEvaluator(args.env, workers=args.workers, max_episode_steps=args.max_episode_steps)
+    report = evaluator.evaluate(policy, min_episodes=args.min_episodes, max_episodes=args.max_episodes,
+                                confidence=args.confidence, tolerance=args.tolerance, seed=args.seed)
+    evaluator.close()
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Añadir game/ a sys.path para importar desde training/ los módulos del juego.
+
+Los scripts de training/ se ejecutan directamente (python training/x.py), sin paquete, así
+que importan este módulo antes que pygame_extension, simulation, etc.
+"""
+import os
+import sys
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "game")
+
+if GAME_DIR not in sys.path:
+    sys.path.append(GAME_DIR)
@@ -1,126 +1,153 @@
-import pygame
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 
+from hunter_prey_vec import PreyHunterBatch, draw_arena
+from profiling import PhaseProfiler
+from rendering import RENDER_MODES, Renderer
 
-class PreyHunterEnv(gym.Env):
-    def __init__(self):
-        super(PreyHunterEnv, self).__init__()
 
-        self.action_space = spaces.MultiDiscrete([4] * 6)  # 3 preys + 3 hunters
-
-        # Espacio de observación: 2 para cada prey y cada hunter (posiciones x, y)
-        self.observation_space = spaces.Box(low=0, high=1, shape=(12,), dtype=np.float32)
+class PreyHunterEnv(gym.Env):
+    metadata = {'render_modes': RENDER_MODES, 'render_fps': 30}
 
-        # Inicializar las posiciones de 3 preys y 3 hunters
-        self.num_preys = 3
-        self.num_hunters = 3
-        self.prey_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_preys)]
-        self.hunter_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_hunters)]
+    def __init__(self, render_mode=None, profile=False, num_preys=3, num_hunters=3, cutoff_radius=None,
+                 k_nearest=None, reuse_obs=False, **batch_kwargs):
+        super(PreyHunterEnv, self).__init__()
+        self.profiler = PhaseProfiler(enabled=profile)
+        self.render_mode = render_mode
+        self.renderer = Renderer(render_mode, caption="Prey vs Hunters")
+        # reuse_obs=True: step y reset devuelven la observación del batch sin copiarla (el paso
+        # siguiente la sobrescribe); solo para quien la copia de todas formas
+        self.reuse_obs = reuse_obs
+
+        # Las posiciones viven en una arena de PreyHunterBatch (el mismo motor que usa PreyHunterVecEnv);
+        # batch_kwargs (prey_speed, hunter_speed, capture_distance) van directos a ella
+        self.num_preys = num_preys
+        self.num_hunters = num_hunters
+        self.batch = PreyHunterBatch(1, num_preys=num_preys, num_hunters=num_hunters, cutoff_radius=cutoff_radius,
+                                     k_nearest=k_nearest, profiler=self.profiler, **batch_kwargs)
+
+        # Una acción por agente (preys y luego hunters)
+        self.action_space = self.batch.action_space()
+
+        # Espacio de observación: 2 para cada prey y cada hunter (posiciones x, y),
+        # o con k_nearest la posición de cada agente y sus k rivales más cercanos
+        self.observation_space = self.batch.observation_space()
+        self.prey_positions = self.batch.prey_positions[0]
+        self.hunter_positions = self.batch.hunter_positions[0]
+        self.batch.reset(self.np_random)
 
         # Velocidades
-        self.prey_speed = 0.005
-        self.hunter_speed = 0.01
+        self.prey_speed = self.batch.prey_speed
+        self.hunter_speed = self.batch.hunter_speed
 
     def reset(self, seed=None, options=None):
         """Reiniciar el entorno."""
-        super().reset(seed=seed)
-        self.np_random, _ = gym.utils.seeding.np_random(seed)
+        super().reset(seed=seed)  # Con seed, self.np_random pasa a ser un Generator nuevo con esa semilla
 
         # Reiniciar las posiciones de los preys y hunters
-        self.prey_positions = [self.np_random.random(2).astype(np.float32) for _ in range(self.num_preys)]
-        self.hunter_positions = [self.np_random.random(2).astype(np.float32) for _ in range(self.num_hunters)]
+        self.batch.reset(self.np_random)
 
         return self._get_observation(), {}
 
     def _get_observation(self):
         """Obtener la observación de todos los preys y hunters."""
-        return np.concatenate(self.prey_positions + self.hunter_positions).astype(np.float32)
+        observation = self.batch.observations()[0]
+        return observation if self.reuse_obs else observation.copy()
 
     def step(self, action):
         """Ejecutar un paso en el entorno para todos los preys y hunters."""
-        # Separar las acciones de los preys y los hunters
-        prey_actions = action[:self.num_preys]
-        hunter_actions = action[self.num_preys:]
-
-        # Movimiento de los preys basado en las acciones
-        for i, prey_action in enumerate(prey_actions):
-            if prey_action == 0:  # Mover hacia arriba
-                self.prey_positions[i][1] += self.prey_speed
-            elif prey_action == 1:  # Mover hacia abajo
-                self.prey_positions[i][1] -= self.prey_speed
-            elif prey_action == 2:  # Mover hacia la izquierda
-                self.prey_positions[i][0] -= self.prey_speed
-            elif prey_action == 3:  # Mover hacia la derecha
-                self.prey_positions[i][0] += self.prey_speed
-
-        # Movimiento de los hunters basado en las acciones
-        for i, hunter_action in enumerate(hunter_actions):
-            if hunter_action == 0:  # Mover hacia arriba
-                self.hunter_positions[i][1] += self.hunter_speed
-            elif hunter_action == 1:  # Mover hacia abajo
-                self.hunter_positions[i][1] -= self.hunter_speed
-            elif hunter_action == 2:  # Mover hacia la izquierda
-                self.hunter_positions[i][0] -= self.hunter_speed
-            elif hunter_action == 3:  # Mover hacia la derecha
-                self.hunter_positions[i][0] += self.hunter_speed
-
-        # Limitar las posiciones al rango [0, 1]
-        self.prey_positions = [np.clip(pos, 0, 1) for pos in self.prey_positions]
-        self.hunter_positions = [np.clip(pos, 0, 1) for pos in self.hunter_positions]
-
-        # Recompensas
-        total_prey_reward = 0
-        total_hunter_reward = 0
-
-        for prey_pos in self.prey_positions:
-            for hunter_pos in self.hunter_positions:
-                distance = np.linalg.norm(prey_pos - hunter_pos)
-                total_prey_reward += distance  # Preys son recompensados por estar lejos de los hunters
-                total_hunter_reward -= distance  # Hunters son recompensados por acercarse a los preys
-
-        # Unificar las recompensas sumando las de preys y hunters
-        total_reward = total_prey_reward + total_hunter_reward
-
-        # Condiciones de terminación
-        terminated = any(
-            np.linalg.norm(prey_pos - hunter_pos) < 0.05 for prey_pos in self.prey_positions for hunter_pos in
-            self.hunter_positions)
+        # Mover, limitar al rango [0, 1] y calcular distancias en un solo paso vectorizado
+        rewards, terminated = self.batch.step(np.asarray(action).reshape(1, -1))
+
+        total_reward = float(rewards[0])
         truncated = False  # Puedes cambiar esto si implementas un límite de tiempo
-        info = {}
+        # La recompensa unificada se anula; la de cada equipo va en info
+        info = {"team_rewards": {"preys": float(self.batch.prey_rewards[0]),
+                                 "hunters": float(self.batch.hunter_rewards[0])}}
 
         # Devolver las observaciones, recompensa unificada, estado de terminación, truncamiento y info
-        return self._get_observation(), total_reward, terminated, truncated, info
-
-    def render(self, mode='human'):
-        """Renderizar el entorno usando Pygame."""
-
-        # Inicializar Pygame si no lo has hecho antes
-        if not hasattr(self, 'screen'):
-            pygame.init()
-            self.screen = pygame.display.set_mode((800, 600))  # Tamaño de la ventana
-            pygame.display.set_caption("Prey vs Hunters")
-
-        # Manejo de eventos para evitar que la ventana se congele
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        # Limpiar la pantalla con un fondo blanco
-        self.screen.fill((255, 255, 255))
-
-        # Dibujar los preys (cuadrados verdes)
-        for prey_pos in self.prey_positions:
-            prey_x = int(prey_pos[0] * 800)
-            prey_y = int(prey_pos[1] * 600)
-            pygame.draw.rect(self.screen, (0, 255, 0), (prey_x, prey_y, 20, 20))
-
-        # Dibujar los hunters (cuadrados rojos)
-        for hunter_pos in self.hunter_positions:
-            hunter_x = int(hunter_pos[0] * 800)
-            hunter_y = int(hunter_pos[1] * 600)
-            pygame.draw.rect(self.screen, (255, 0, 0), (hunter_x, hunter_y, 20, 20))
-
-        # Actualizar la pantalla
-        pygame.display.flip()
\ No newline at end of file
+        with self.profiler.phase("observation"):
+            observation = self._get_observation()
+        return observation, total_reward, bool(terminated[0]), truncated, info
+
+    def agent_positions(self):
+        """Posiciones actuales por grupo de agentes (para grabar y reproducir trayectorias)."""
+        return {"preys": self.prey_positions, "hunters": self.hunter_positions}
+
+    def get_phase_stats(self):
+        """Tiempo acumulado y llamadas por fase del step (vacío salvo con profile=True)."""
+        return self.profiler.stats()
+
+    def render(self):
+        """Renderizar el entorno usando Pygame según render_mode."""
+        if self.render_mode is None:
+            return None
+        draw_arena(self.renderer.get_surface(), self.prey_positions, self.hunter_positions)
+        return self.renderer.present()
+
+    def close(self):
+        self.renderer.close()
+
+
+class PreyHunterParallelEnv:
+    """API multiagente en paralelo (al estilo de PettingZoo) sobre PreyHunterEnv, con un agente por equipo.
+
+    Los agentes son "preys" y "hunters": cada uno recibe su observación y su recompensa, y
+    step() espera un diccionario con la acción MultiDiscrete de cada equipo. Sin k_nearest
+    los dos equipos ven todas las posiciones; con k_nearest cada uno ve las filas de sus agentes.
+    """
+    metadata = PreyHunterEnv.metadata
+    possible_agents = ["preys", "hunters"]
+
+    def __init__(self, render_mode=None, **env_kwargs):
+        self.env = PreyHunterEnv(render_mode=render_mode, **env_kwargs)
+        self.render_mode = render_mode
+        self.agents = list(self.possible_agents)
+        sizes = {"preys": self.env.num_preys, "hunters": self.env.num_hunters}
+        self.team_slices = {"preys": slice(0, self.env.num_preys),
+                            "hunters": slice(self.env.num_preys, self.env.num_preys + self.env.num_hunters)}
+
+        space = self.env.observation_space
+        self.action_spaces = {team: spaces.MultiDiscrete([4] * size) for team, size in sizes.items()}
+        if self.env.batch.k_nearest is None:
+            self.observation_spaces = {team: space for team in self.possible_agents}
+        else:
+            self.observation_spaces = {
+                team: spaces.Box(low=-1, high=1, shape=(size, *space.shape[1:]), dtype=np.float32)
+                for team, size in sizes.items()
+            }
+
+    def observation_space(self, agent):
+        return self.observation_spaces[agent]
+
+    def action_space(self, agent):
+        return self.action_spaces[agent]
+
+    def _team_observations(self, observation):
+        if self.env.batch.k_nearest is None:
+            return {team: observation for team in self.agents}
+        return {team: observation[self.team_slices[team]] for team in self.agents}
+
+    def reset(self, seed=None, options=None):
+        self.agents = list(self.possible_agents)
+        observation, _ = self.env.reset(seed=seed, options=options)
+        return self._team_observations(observation), {team: {} for team in self.agents}
+
+    def step(self, actions):
+        action = np.concatenate([np.asarray(actions["preys"]).ravel(), np.asarray(actions["hunters"]).ravel()])
+        observation, _, terminated, truncated, info = self.env.step(action)
+        observations = self._team_observations(observation)
+        rewards = info["team_rewards"]
+        terminations = {team: terminated for team in self.agents}
+        truncations = {team: truncated for team in self.agents}
+        infos = {team: {} for team in self.agents}
+        if terminated or truncated:
+            self.agents = []
+        return observations, rewards, terminations, truncations, infos
+
+    def render(self):
+        return self.env.render()
+
+    def close(self):
+        self.env.close()
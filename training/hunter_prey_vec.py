@@ -0,0 +1,287 @@
+import numpy as np
+import pygame
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+import kernels
+from neighbors import CellList, k_nearest, k_nearest_dense
+from profiling import PhaseProfiler
+from rendering import WIDTH, HEIGHT, Renderer
+
+# Desplazamiento unitario por acción: 0 arriba, 1 abajo, 2 izquierda, 3 derecha
+ACTION_DELTAS = np.array([[0.0, 1.0], [0.0, -1.0], [-1.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+
+
+def draw_arena(surface, prey_positions, hunter_positions):
+    """Dibujar una arena de PreyHunterEnv sobre una superficie de Pygame."""
+    # Limpiar la pantalla con un fondo blanco
+    surface.fill((255, 255, 255))
+
+    # Dibujar los preys (cuadrados verdes)
+    for prey_pos in prey_positions:
+        pygame.draw.rect(surface, (0, 255, 0), (int(prey_pos[0] * WIDTH), int(prey_pos[1] * HEIGHT), 20, 20))
+
+    # Dibujar los hunters (cuadrados rojos)
+    for hunter_pos in hunter_positions:
+        pygame.draw.rect(surface, (255, 0, 0), (int(hunter_pos[0] * WIDTH), int(hunter_pos[1] * HEIGHT), 20, 20))
+
+
+class PreyHunterBatch:
+    """N arenas de PreyHunterEnv guardadas en un único array (N, agentes, 2).
+
+    Con cutoff_radius las distancias prey-hunter solo se evalúan para los vecinos que encuentra
+    una CellList: las que superan el radio cuentan como cutoff_radius en la recompensa. Con
+    k_nearest la observación de cada agente es su posición y los k rivales más cercanos
+    (dx, dy, presente), de tamaño fijo aunque crezcan los equipos.
+
+    Posiciones, distancias, recompensas, terminaciones y observaciones viven en arrays
+    reservados al crearlo que cada step/reset sobrescribe: quien quiera conservarlos entre
+    pasos tiene que copiarlos.
+    """
+
+    def __init__(self, num_arenas, num_preys=3, num_hunters=3, prey_speed=0.005, hunter_speed=0.01,
+                 capture_distance=0.05, cutoff_radius=None, k_nearest=None, profiler=None, jit=False):
+        if cutoff_radius is not None and cutoff_radius < capture_distance:
+            raise ValueError("cutoff_radius no puede ser menor que capture_distance")
+        self.profiler = profiler or PhaseProfiler()
+        self.num_arenas = num_arenas
+        self.num_preys = num_preys
+        self.num_hunters = num_hunters
+        self.num_agents = num_preys + num_hunters
+        self.prey_speed = prey_speed
+        self.hunter_speed = hunter_speed
+        self.capture_distance = capture_distance
+        self.cutoff_radius = cutoff_radius
+        self.k_nearest = k_nearest
+        self.cell_list = CellList(cutoff_radius) if cutoff_radius is not None else None
+
+        # Posiciones de todas las arenas: primero los preys y luego los hunters
+        self.positions = np.zeros((num_arenas, self.num_agents, 2), dtype=np.float32)
+        self.prey_positions = self.positions[:, :num_preys]
+        self.hunter_positions = self.positions[:, num_preys:]
+
+        # Velocidad de cada agente, lista para multiplicar por ACTION_DELTAS[actions]
+        self.speeds = np.array([prey_speed] * num_preys + [hunter_speed] * num_hunters,
+                               dtype=np.float32)[None, :, None]
+        # jit=True: movimiento, distancias, recompensa y capturas de todas las arenas en un kernel de numba
+        # (si está instalado); con cutoff_radius el paso sigue en NumPy con la CellList
+        self.jit = kernels.resolve_jit(jit) and cutoff_radius is None
+
+        # Arrays de trabajo del paso denso, reservados una vez: el paso escribe en ellos con out=
+        self._moves = np.empty_like(self.positions)
+        self._offsets = np.empty((num_arenas, num_preys, num_hunters, 2), dtype=np.float32)
+        self._captures = np.empty((num_arenas, num_preys, num_hunters), dtype=bool)
+        # Recompensas de cada equipo por separado, para entrenar preys y hunters con políticas distintas
+        self.prey_rewards = np.zeros(num_arenas)
+        self.hunter_rewards = np.zeros(num_arenas)
+        self.rewards = np.zeros(num_arenas)
+        self.terminated = np.zeros(num_arenas, dtype=bool)
+        if k_nearest is not None:
+            self._observations = np.empty((num_arenas, self.num_agents, 2 + 3 * k_nearest), dtype=np.float32)
+            self._neighbours = np.empty((num_arenas, self.num_agents, k_nearest, 3), dtype=np.float32)
+
+        # Distancias prey-hunter del último step/reset: recompensa, terminación y observación las leen de aquí.
+        # Sin cutoff_radius es la matriz (N, preys, hunters); con él, la lista de pares vecinos
+        self.prey_hunter_distances = (np.empty((num_arenas, num_preys, num_hunters), dtype=np.float32)
+                                      if cutoff_radius is None else None)
+        self.neighbor_pairs = None
+        self._update_distances()
+
+    def action_space(self):
+        return spaces.MultiDiscrete([4] * self.num_agents)
+
+    def observation_space(self):
+        if self.k_nearest is None:
+            return spaces.Box(low=0, high=1, shape=(self.num_agents * 2,), dtype=np.float32)
+        return spaces.Box(low=-1, high=1, shape=(self.num_agents, 2 + 3 * self.k_nearest), dtype=np.float32)
+
+    def reset(self, rng, indices=None):
+        """Reiniciar las arenas indicadas (todas si indices es None)."""
+        if indices is None:
+            self.positions[:] = rng.random(self.positions.shape, dtype=np.float32)
+        else:
+            self.positions[indices] = rng.random((len(indices), self.num_agents, 2), dtype=np.float32)
+        self._update_distances()
+
+    def observations(self):
+        """Observación de cada arena: posiciones aplanadas (N, agentes * 2) o, con k_nearest, (N, agentes, 2 + 3k).
+
+        Es siempre el mismo array (sin k_nearest, una vista de las posiciones), así que el
+        siguiente step o reset lo cambia.
+        """
+        if self.k_nearest is None:
+            return self.positions.reshape(self.num_arenas, -1)
+
+        obs = self._observations
+        obs[:, :, :2] = self.positions
+        # Preys ven a los hunters más cercanos y los hunters a los preys más cercanos
+        neighbours = self._neighbours
+        if self.cell_list is None:
+            distances = self.prey_hunter_distances
+            k_nearest_dense(neighbours[:, :self.num_preys], distances, self.prey_positions, self.hunter_positions)
+            k_nearest_dense(neighbours[:, self.num_preys:], distances.transpose(0, 2, 1), self.hunter_positions,
+                            self.prey_positions)
+        else:
+            arenas, preys, hunters, distances = self.neighbor_pairs
+            by_distance = np.argsort(distances)
+            arenas, preys, hunters = arenas[by_distance], preys[by_distance], hunters[by_distance]
+            offsets = self.hunter_positions[arenas, hunters] - self.prey_positions[arenas, preys]
+            k_nearest(neighbours[:, :self.num_preys], arenas, preys, offsets)
+            k_nearest(neighbours[:, self.num_preys:], arenas, hunters, -offsets)
+        obs[:, :, 2:] = neighbours.reshape(self.num_arenas, self.num_agents, -1)
+        return obs
+
+    def distances(self, out=None):
+        """Distancias prey-hunter de todas las arenas, shape (N, preys, hunters), en out si se da."""
+        diff = np.subtract(self.prey_positions[:, :, None, :], self.hunter_positions[:, None, :, :], out=self._offsets)
+        out = np.einsum('nphk,nphk->nph', diff, diff, out=out)
+        return np.sqrt(out, out=out)
+
+    def pairs(self):
+        """Pares prey-hunter (arena, prey, hunter, distancia) del último step: todos, o los vecinos con cutoff_radius."""
+        if self.neighbor_pairs is None:
+            arenas, preys, hunters = np.indices(self.prey_hunter_distances.shape).reshape(3, -1)
+            self.neighbor_pairs = arenas, preys, hunters, self.prey_hunter_distances.ravel()
+        return self.neighbor_pairs
+
+    def _update_distances(self):
+        if self.cell_list is None:
+            self.distances(out=self.prey_hunter_distances)
+            self.neighbor_pairs = None  # Se deriva de la matriz solo si alguien lo pide
+        else:
+            self.cell_list.rebuild(self.hunter_positions)
+            self.neighbor_pairs = self.cell_list.pairs(self.prey_positions)
+
+    def step(self, actions):
+        """Mover todas las arenas con un array de acciones (N, agentes) y devolver recompensas y terminaciones."""
+        if self.jit:
+            with self.profiler.phase("compiled_step"):
+                kernels.prey_hunter_step(self.positions, actions, self.speeds.ravel(), self.num_preys,
+                                         np.float32(self.capture_distance), self.prey_hunter_distances,
+                                         self.prey_rewards, self.terminated)
+                self.neighbor_pairs = None
+            total_prey_reward, terminated = self.prey_rewards, self.terminated
+            total_hunter_reward = np.negative(total_prey_reward, out=self.hunter_rewards)
+            rewards = np.add(total_prey_reward, total_hunter_reward, out=self.rewards)
+        else:
+            with self.profiler.phase("movement"):
+                moves = np.take(ACTION_DELTAS, actions, axis=0, out=self._moves, mode="clip")
+                moves *= self.speeds
+                self.positions += moves
+                np.clip(self.positions, 0, 1, out=self.positions)
+
+            with self.profiler.phase("distances"):
+                self._update_distances()
+
+            with self.profiler.phase("reward"):
+                # Preys recompensados por estar lejos, hunters por acercarse; se suman en una sola recompensa
+                if self.cell_list is None:
+                    distances = self.prey_hunter_distances
+                    total_prey_reward = distances.sum(axis=(1, 2), dtype=np.float64, out=self.prey_rewards)
+                    captures = np.less(distances, self.capture_distance, out=self._captures)
+                    terminated = captures.any(axis=(1, 2), out=self.terminated)
+                else:
+                    # Los pares fuera del radio no se evalúan y suman cutoff_radius cada uno
+                    arenas, _, _, distances = self.neighbor_pairs
+                    near_sum = np.bincount(arenas, weights=distances, minlength=self.num_arenas)
+                    near_count = np.bincount(arenas, minlength=self.num_arenas)
+                    total_prey_reward = np.add(near_sum, (self.num_preys * self.num_hunters - near_count)
+                                               * self.cutoff_radius, out=self.prey_rewards)
+                    captured = arenas[distances < self.capture_distance]
+                    terminated = np.greater(np.bincount(captured, minlength=self.num_arenas), 0, out=self.terminated)
+                total_hunter_reward = np.negative(total_prey_reward, out=self.hunter_rewards)
+                rewards = np.add(total_prey_reward, total_hunter_reward, out=self.rewards)
+
+        return rewards, terminated
+
+
+class PreyHunterVecEnv(VecEnv):
+    """VecEnv de SB3 que simula N arenas de PreyHunterEnv con PreyHunterBatch y las reinicia por separado.
+
+    Con reuse_obs=True, step y reset devuelven directamente el array de observaciones del
+    batch, que el paso siguiente sobrescribe: solo para quien las copia de todas formas (los
+    algoritmos de SB3 guardan la observación anterior y necesitan la copia por defecto).
+    """
+
+    def __init__(self, num_envs, seed=None, render_mode=None, profile=False, reuse_obs=False, **batch_kwargs):
+        self.render_mode = render_mode
+        self.reuse_obs = reuse_obs
+        self.renderer = Renderer(render_mode, caption="Prey vs Hunters")
+        self.profiler = PhaseProfiler(enabled=profile)
+        self.batch = PreyHunterBatch(num_envs, profiler=self.profiler, **batch_kwargs)
+        self.rng = np.random.default_rng(seed)
+        self.actions = None
+
+        super().__init__(num_envs, self.batch.observation_space(), self.batch.action_space())
+
+    def reset(self):
+        """Reiniciar todas las arenas."""
+        seed = self._seeds[0]
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.batch.reset(self.rng)
+        self._reset_seeds()
+        self._reset_options()
+        obs = self.batch.observations()
+        return obs if self.reuse_obs else obs.copy()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs, self.batch.num_agents)
+
+    def step_wait(self):
+        rewards, dones = self.batch.step(self.actions)
+        with self.profiler.phase("observation"):
+            obs = self.batch.observations()
+        infos = [{} for _ in range(self.num_envs)]
+
+        # Autoreset: guardar la observación final y reiniciar solo las arenas terminadas
+        with self.profiler.phase("autoreset"):
+            done_indices = np.flatnonzero(dones)
+            if done_indices.size:
+                for i in done_indices:
+                    infos[i]["terminal_observation"] = obs[i].copy()
+                    infos[i]["TimeLimit.truncated"] = False
+                self.batch.reset(self.rng, done_indices)
+                # Reescribe el mismo array de observaciones, ahora con las arenas reiniciadas
+                obs = self.batch.observations()
+
+        # dones es un array del batch: se copia siempre porque SB3 lo guarda entre pasos
+        return obs if self.reuse_obs else obs.copy(), rewards.astype(np.float32), dones.copy(), infos
+
+    def agent_positions(self, index=0):
+        """Posiciones actuales por grupo de agentes de una arena (por defecto la primera)."""
+        return {"preys": self.batch.prey_positions[index], "hunters": self.batch.hunter_positions[index]}
+
+    def get_phase_stats(self):
+        """Tiempo acumulado y llamadas por fase del step de todas las arenas (vacío salvo con profile=True)."""
+        return self.profiler.stats()
+
+    def close(self):
+        self.renderer.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    def _render_arena(self, index):
+        draw_arena(self.renderer.get_surface(), self.batch.prey_positions[index], self.batch.hunter_positions[index])
+        return self.renderer.present()
+
+    def get_images(self):
+        """Frames (alto, ancho, 3) de todas las arenas; requiere render_mode="rgb_array"."""
+        return [self._render_arena(i) for i in range(self.num_envs)]
+
+    def render(self, mode=None):
+        """Renderizar la primera arena: en ventana con "human" o como frame con "rgb_array"."""
+        if self.render_mode is None:
+            return None
+        return self._render_arena(0)
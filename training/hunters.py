@@ -3,17 +3,34 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 
-WIDTH = 800
-HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+import kernels
+from obstacle_grid import ObstacleGrid
+from profiling import PhaseProfiler
+from random_buffer import RandomBuffer
+from rendering import WIDTH, HEIGHT, RENDER_MODES, Renderer, occupancy_surface
+
+# Distance from an obstacle's position at which the hunter and the preys are blocked
+OBSTACLE_RADIUS = 0.07
 
 
 class HunterPreyEnv(gym.Env):
     """Custom Environment that follows gym interface"""
-    metadata = {'render.modes': ['human']}
+    metadata = {'render_modes': RENDER_MODES, 'render_fps': 30}
 
-    def __init__(self):
+    def __init__(self, num_preys=5, num_obstacles=2, render_mode=None, profile=False, obstacle_map=None,
+                 grid_resolution=256, prey_speed=0.1, hunter_speed=0.1, capture_distance=0.1, jit=False,
+                 reuse_obs=False):
         super(HunterPreyEnv, self).__init__()
+        self.profiler = PhaseProfiler(enabled=profile)
+        # jit=True: movement, obstacles and distances in one numba kernel (if installed), same trajectories
+        self.jit = kernels.resolve_jit(jit)
+        # reuse_obs=True: step and reset always return the same observation array, overwritten by the
+        # next step; only for callers that copy it anyway (e.g. SharedMemoryVecEnv)
+        self.reuse_obs = reuse_obs
+        # Toda la aleatoriedad sale de self.np_random por bloques; reset(seed=...) la hace repetible
+        self.random = RandomBuffer(self.np_random)
+        self.render_mode = render_mode
+        self.renderer = Renderer(render_mode, caption="Hunter vs Preys")
         self.capture_count = 0
 
         # Define action and observation space
@@ -26,42 +43,82 @@ class HunterPreyEnv(gym.Env):
         self.observation_space = spaces.Box(low=-1, high=1, shape=(2,), dtype=np.float32)
 
         # Prey variables
-        self.num_preys = 5
-        self.prey_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_preys)]
-        self.prey_speed = 0.1  # Prey speed (you can make this dynamic)
+        # Los preys viven en un array fijo (num_preys, 2); las capturas solo apagan su entrada en prey_alive
+        self.num_preys = num_preys
+        self.prey_positions = self.random.random((self.num_preys, 2)).astype(np.float32)
+        self.prey_alive = np.ones(self.num_preys, dtype=bool)
+        self.prey_speed = prey_speed  # Prey speed (you can make this dynamic)
 
         # Hunter variables
-        self.hunter_pos = np.array([0.0, 0.0])  # Hunter starts at the center
-        self.hunter_speed = 0.1  # Hunter speed
+        self.hunter_pos = np.zeros(2)  # Hunter starts at the center
+        # The hunter speeds up with every capture (up to max_hunter_speed) and starts over on reset
+        self.initial_hunter_speed = hunter_speed
+        self.max_hunter_speed = max(hunter_speed, 0.1)
+        self.hunter_speed = hunter_speed  # Hunter speed
+        self.capture_distance = capture_distance
         self.hunter_size = 25
 
         # Obstacles
-        self.num_obstacles = 2
+        self.num_obstacles = num_obstacles
         self.obstacle_size = 40
-        self.obstacle_positions = [self._generate_obstacle_position() for _ in range(self.num_obstacles)]
+        # obstacle_map: optional boolean image (rows = y) with extra obstacles of any shape, e.g. a maze
+        self.obstacle_map = obstacle_map
+        self.obstacle_grid = ObstacleGrid(grid_resolution)
+        self.obstacle_map_surface = None
+        self._generate_obstacles()
+
+        # Step buffers, allocated once and overwritten in place (out=) by every step. The hunter
+        # and the distances stay float64, as they have always been computed
+        self.observation = np.empty(2, dtype=np.float32)
+        self._new_hunter_pos = np.empty(2)
+        self._hunter_blocked = np.empty((), dtype=bool)
+        self._prey_offsets = np.empty((self.num_preys, 2))
+        self._prey_movable = np.empty(self.num_preys, dtype=bool)
+        self._captured = np.empty(self.num_preys, dtype=bool)
+        self._distances = np.empty(self.num_preys)
+
+        # Prey más cercano al hunter, calculado una vez por paso y reutilizado por la recompensa y la observación
+        self.closest_prey_index = None
+        self.closest_distance = float('inf')
+        self._update_closest_prey()
+
+    def _generate_obstacles(self):
+        """Place the random obstacles and bake them (plus obstacle_map) into the occupancy grid."""
+        self.obstacle_positions = np.array([self._generate_obstacle_position() for _ in range(self.num_obstacles)])
+        self.obstacle_grid.clear()
+        self.obstacle_grid.add_circles(self.obstacle_positions, OBSTACLE_RADIUS)
+        if self.obstacle_map is not None:
+            self.obstacle_grid.add_mask(self.obstacle_map)
 
     def _generate_obstacle_position(self):
         """Genera una posición para un obstáculo que esté dentro de los límites de la pantalla."""
         # Asegurar que el obstáculo no esté demasiado cerca de los bordes
         margin = self.obstacle_size / WIDTH  # Ajusta según el tamaño de la ventana (por ejemplo, 800x600)
-        return np.random.rand(2) * (1 - 2 * margin) + margin
+        return self.random.random(2) * (1 - 2 * margin) + margin
 
     def reset(self, seed=None, options=None):
         """Reset the environment and return the initial observation."""
         super().reset(seed=seed)
+        if seed is not None:
+            # Nueva semilla: nuevo generador y nuevos obstáculos, para que toda la partida dependa solo de ella
+            self.random = RandomBuffer(self.np_random)
+            self._generate_obstacles()
 
         # Reset positions
-        self.hunter_pos = np.array([0.0, 0.0])
-        self.prey_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_preys)]
+        self.hunter_pos[:] = 0.0
+        self.prey_positions[:] = self.random.random((self.num_preys, 2))
+        self.prey_alive[:] = True
+        self._update_closest_prey()
 
         # Reset hunter speed and size
-        self.hunter_speed = 0.1  # Restablecer velocidad inicial del hunter
+        self.hunter_speed = self.initial_hunter_speed  # Restablecer velocidad inicial del hunter
         self.hunter_size = 25
         # Return the initial observation
         return self._get_observation(), {}
 
-    def _calculate_new_hunter_position(self, action: int) -> list:
-        new_hunter_pos = np.copy(self.hunter_pos)
+    def _calculate_new_hunter_position(self, action: int) -> np.ndarray:
+        new_hunter_pos = self._new_hunter_pos
+        new_hunter_pos[:] = self.hunter_pos
         if action == 0:  # Mover hacia arriba
             new_hunter_pos[1] += self.hunter_speed
         elif action == 1:  # Mover hacia abajo
@@ -72,101 +129,154 @@ class HunterPreyEnv(gym.Env):
             new_hunter_pos[0] += self.hunter_speed
         return new_hunter_pos
 
-    def _check_obstacle_collision(self, action: int, new_hunter_pos: list):
-        if self._check_collision(new_hunter_pos, self.obstacle_positions):
-            # Evasión controlada: ajustar la dirección ligeramente para evitar el obstáculo
-            adjustment = 0.1
-
-            if action == 0 or action == 1:  # Movimientos verticales
-                # Intentar moverse lateralmente para evitar el obstáculo
-                new_hunter_pos[0] += np.random.choice([-adjustment, adjustment])
-            else:  # Movimientos horizontales
-                # Intentar moverse verticalmente para evitar el obstáculo
-                new_hunter_pos[1] += np.random.choice([-adjustment, adjustment])
-        return new_hunter_pos
-
-    def _move_preys(self) -> None:
-        for i in range(len(self.prey_positions)):
-            new_prey_pos = self.prey_positions[i] + (np.random.rand(2) - 0.5) * self.prey_speed
-
-            # Verificar colisión con los obstáculos
-            if not self._check_collision(new_prey_pos, self.obstacle_positions):
-                self.prey_positions[i] = new_prey_pos  # Mover solo si no hay colisión
-            self.prey_positions[i] = np.clip(self.prey_positions[i], 0, 1)
+    def _check_obstacle_collision(self, action: int, new_hunter_pos: list, uniform: float):
+        """Esquivar un obstáculo en new_hunter_pos; devuelve (posición, si sigue bloqueada)."""
+        if not self._check_collision(new_hunter_pos):
+            # Sin colisión no hace falta volver a medir las distancias a los obstáculos
+            return new_hunter_pos, False
+
+        # Evasión controlada: ajustar la dirección ligeramente para evitar el obstáculo
+        adjustment = 0.1
+
+        if action == 0 or action == 1:  # Movimientos verticales
+            # Intentar moverse lateralmente para evitar el obstáculo
+            new_hunter_pos[0] += adjustment if uniform < 0.5 else -adjustment
+        else:  # Movimientos horizontales
+            # Intentar moverse verticalmente para evitar el obstáculo
+            new_hunter_pos[1] += adjustment if uniform < 0.5 else -adjustment
+        return new_hunter_pos, self._check_collision(new_hunter_pos)
+
+    def _move_preys(self, uniforms) -> None:
+        new_prey_positions = np.subtract(uniforms, 0.5, out=self._prey_offsets)
+        new_prey_positions *= self.prey_speed
+        new_prey_positions += self.prey_positions
+
+        # Mover solo los preys vivos cuya nueva posición no colisiona con ningún obstáculo
+        movable = self.obstacle_grid.blocked(new_prey_positions, out=self._prey_movable)
+        np.logical_not(movable, out=movable)
+        movable &= self.prey_alive
+        np.copyto(self.prey_positions, new_prey_positions, casting="same_kind", where=movable[:, None])
+        np.clip(self.prey_positions, 0, 1, out=self.prey_positions)
 
     def step(self, action):
         """Execute one time step within the environment."""
-
-        new_hunter_pos = self._calculate_new_hunter_position(action=action)
-
-        new_hunter_pos = self._check_obstacle_collision(action=action, new_hunter_pos=new_hunter_pos)
-
-        # Si todavía hay colisión, no moverse en esa dirección
-        if self._check_collision(new_hunter_pos, self.obstacle_positions):
-            return self._get_observation(), 0, False, False, {}
-
-        # Si no hay colisión, mover al hunter
-        self.hunter_pos = new_hunter_pos
-
-        # Limitar la posición del hunter dentro de los límites
-        self.hunter_pos[0] = np.clip(self.hunter_pos[0], 0, 1)
-        self.hunter_pos[1] = np.clip(self.hunter_pos[1], 0, 1)
-
-        # Move preys
-        self._move_preys()
-
-        # Check if there are preys
-        if not self.prey_positions:
-            return self._get_observation(), 0, True, False, {}  # Si no hay preys, termina el episodio
-
-        # Get distance to closest prey
-        closest_prey_index, closest_distance = self._get_closest_prey()
+        captures_before = self.capture_count
+        reward, terminated = self._advance(action)
+
+        with self.profiler.phase("observation"):
+            observation = self._get_observation()
+        # A capture doesn't end the episode, so report it for evaluation
+        return observation, reward, terminated, False, {"captures": self.capture_count - captures_before}
+
+    def _advance(self, action):
+        """Move the hunter and the preys, returning (reward, terminated)."""
+        # All the step's uniforms at once (the dodge's and each prey's), used or not, so both backends draw the same
+        uniforms = self.random.random(1 + 2 * self.num_preys)
+        if self.jit:
+            with self.profiler.phase("compiled_movement"):
+                moved = kernels.hunter_env_move(self.hunter_pos, self.prey_positions, self.prey_alive, self._distances,
+                                                uniforms, int(action), self.hunter_speed, self.prey_speed,
+                                                self.obstacle_grid.occupancy)
+            if not moved:
+                return 0, False
+            closest_prey_index, closest_distance = self._select_closest_prey()
+        else:
+            with self.profiler.phase("movement"):
+                new_hunter_pos = self._calculate_new_hunter_position(action=action)
+
+            with self.profiler.phase("obstacles"):
+                new_hunter_pos, blocked = self._check_obstacle_collision(action=action, new_hunter_pos=new_hunter_pos,
+                                                                         uniform=uniforms[0])
+
+            # Si todavía hay colisión, no moverse en esa dirección
+            if blocked:
+                return 0, False
+
+            # Si no hay colisión, mover al hunter, dentro de los límites
+            np.clip(new_hunter_pos, 0, 1, out=self.hunter_pos)
+
+            # Move preys
+            with self.profiler.phase("preys"):
+                self._move_preys(uniforms[1:].reshape(self.num_preys, 2))
+
+            # Get distance to closest prey
+            with self.profiler.phase("closest_prey"):
+                closest_prey_index, closest_distance = self._update_closest_prey()
 
         if closest_prey_index is None:  # If not preys, we end the step.
-            return self._get_observation(), 0, True, False, {}
-
-        reward = -closest_distance
-        terminated = bool(closest_distance < 0.1)
-
-        if terminated:
-            # Pop captured prey
-            self.capture_count += 1
-            print(f"Total count: {self.capture_count}")
-            self.hunter_speed = min(self.hunter_speed + 0.001, 0.1)
-            self.prey_positions.pop(closest_prey_index)
-            # If not preys, end step.
-            if not self.prey_positions:
-                return self._get_observation(), reward, True, False, {}
-
-        return self._get_observation(), reward, False, False, {}
-
-    def _get_closest_prey(self):
-        """Find the nearest prey to the hunter."""
-        if not self.prey_positions:  # Check if list is not empty
-            return None, float('inf')  # If not preys, we return inf distance.
-        distances = [np.linalg.norm(self.hunter_pos - prey_pos) for prey_pos in self.prey_positions]
-        closest_index = np.argmin(distances)
-        return closest_index, distances[closest_index]
+            return 0, True
+
+        with self.profiler.phase("reward"):
+            reward = -closest_distance
+            terminated = bool(closest_distance < self.capture_distance)
+
+            if terminated:
+                # Marcar el prey capturado como muerto
+                self.capture_count += 1
+                print(f"Total count: {self.capture_count}")
+                self.hunter_speed = min(self.hunter_speed + 0.001, self.max_hunter_speed)
+                self.prey_alive[closest_prey_index] = False
+                # Reutilizar las distancias del paso para elegir el siguiente prey más cercano
+                self._distances[closest_prey_index] = np.inf
+                self._select_closest_prey()
+                # If not preys, end step.
+                if self.closest_prey_index is None:
+                    return reward, True
+
+        return reward, False
+
+    def agent_positions(self):
+        """Current positions per agent group, for recording and replaying trajectories (captured preys are NaN)."""
+        preys = np.where(self.prey_alive[:, None], self.prey_positions, np.nan)
+        return {"hunters": self.hunter_pos[None], "preys": preys, "obstacles": self.obstacle_positions}
+
+    def get_phase_stats(self):
+        """Cumulative time and calls per step phase (empty unless created with profile=True)."""
+        return self.profiler.stats()
+
+    def _update_closest_prey(self):
+        """Find the nearest alive prey to the hunter with one masked argmin (same values as np.linalg.norm)."""
+        offsets = np.subtract(self.prey_positions, self.hunter_pos, out=self._prey_offsets)
+        offsets *= offsets
+        np.add(offsets[:, 0], offsets[:, 1], out=self._distances)
+        np.sqrt(self._distances, out=self._distances)
+        np.copyto(self._distances, np.inf, where=np.logical_not(self.prey_alive, out=self._captured))
+        return self._select_closest_prey()
+
+    def _select_closest_prey(self):
+        """Pick the nearest prey from the distances computed in this step."""
+        # If not preys (num_preys=0 or all captured), we return inf distance; argmin fails on an empty array
+        if not self.prey_alive.any():
+            self.closest_prey_index, self.closest_distance = None, float('inf')
+            return self.closest_prey_index, self.closest_distance
+        closest_index = int(np.argmin(self._distances))
+        if np.isinf(self._distances[closest_index]):
+            self.closest_prey_index, self.closest_distance = None, float('inf')
+        else:
+            self.closest_prey_index, self.closest_distance = closest_index, float(self._distances[closest_index])
+        return self.closest_prey_index, self.closest_distance
 
     def _get_observation(self):
         """Obtener la posición relativa al prey más cercano."""
-        closest_prey_index, _ = self._get_closest_prey()
+        closest_prey_index = self.closest_prey_index
 
         if closest_prey_index is None:  # Si no hay preys, devolver una observación por defecto
-            return np.zeros(2, dtype=np.float32)  # Devolver un array de ceros como observación
-
-        # Si hay preys, devolver la posición relativa al más cercano
-        return (self.prey_positions[closest_prey_index] - self.hunter_pos).astype(np.float32)
+            self.observation.fill(0)  # Un array de ceros como observación
+        else:
+            # Si hay preys, la posición relativa al más cercano
+            np.subtract(self.prey_positions[closest_prey_index], self.hunter_pos, out=self.observation,
+                        casting="same_kind")
+        return self.observation if self.reuse_obs else self.observation.copy()
 
-    def _check_collision(self, pos, obstacle_positions, safe_distance=0.07):
-        """Verifica si la posición 'pos' colisiona con alguno de los obstáculos."""
-        for obstacle_pos in obstacle_positions:
-            if np.linalg.norm(pos - obstacle_pos) < safe_distance:  # Umbral ajustado para evitar obstáculos cercanos
-                return True  # Colisión detectada
-        return False
+    def _check_collision(self, pos):
+        """Verifica si la posición 'pos' colisiona con alguno de los obstáculos (una lectura de la rejilla)."""
+        return bool(self.obstacle_grid.blocked(pos, out=self._hunter_blocked))
 
     def render(self):
-        """Render the environment (for visualization)."""
+        """Render the environment (for visualization) according to render_mode."""
+        if self.render_mode is None:
+            return None
+        screen = self.renderer.get_surface()
 
         # Limpiar la pantalla con un fondo blanco
         screen.fill((255, 255, 255))
@@ -177,24 +287,27 @@ class HunterPreyEnv(gym.Env):
         pygame.draw.rect(screen, (255, 0, 0), (hunter_x, hunter_y, 20, 20))
 
         # Dibujar cada prey (cuadrado verde)
-        for prey_pos in self.prey_positions:
+        for prey_pos in self.prey_positions[self.prey_alive]:
             prey_x = int(prey_pos[0] * WIDTH)
             prey_y = int(prey_pos[1] * HEIGHT)
             pygame.draw.rect(screen, (0, 255, 0), (prey_x, prey_y, 20, 20))
 
-        # Dibujar cada obstáculo (cuadrado gris)
+        # Dibujar el mapa de obstáculos, si lo hay, y cada obstáculo (cuadrado gris)
+        if self.obstacle_map is not None:
+            if self.obstacle_map_surface is None:
+                self.obstacle_map_surface = occupancy_surface(np.asarray(self.obstacle_map, dtype=bool), (WIDTH, HEIGHT))
+            screen.blit(self.obstacle_map_surface, (0, 0))
         for obstacle_pos in self.obstacle_positions:
             obstacle_x = int(obstacle_pos[0] * WIDTH)
             obstacle_y = int(obstacle_pos[1] * HEIGHT)
             pygame.draw.rect(screen, (128, 128, 128), (obstacle_x, obstacle_y, self.obstacle_size, self.obstacle_size))
 
         # Mostrar el contador de capturas
-        font = pygame.font.SysFont(None, 36)
-        text = font.render(f"Capturas: {self.capture_count}", True, (0, 0, 0))
+        text = self.renderer.get_font().render(f"Capturas: {self.capture_count}", True, (0, 0, 0))
         screen.blit(text, (10, 10))
 
-        # Actualizar la pantalla para mostrar los cambios
-        pygame.display.flip()
+        # Actualizar la pantalla para mostrar los cambios (o devolver el frame)
+        return self.renderer.present()
 
     def close(self):
-        pass
+        self.renderer.close()
@@ -1,23 +1,41 @@
-from stable_baselines3.common.callbacks import BaseCallback
-from hunter_prey import PreyHunterEnv
+import argparse
+
 from stable_baselines3 import A2C
 
-# Callback personalizado para renderizar el entorno durante el entrenamiento
-class RenderCallback(BaseCallback):
-    def __init__(self, env, verbose=0):
-        super(RenderCallback, self).__init__(verbose)
-        self.env = env
+from async_renderer import AsyncRenderer
+from callbacks import AsyncRenderCallback
+from hunter_prey_vec import PreyHunterVecEnv
+
+# Número de arenas simuladas a la vez por PreyHunterVecEnv
+NUM_ENVS = 64
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrenar A2C en PreyHunterVecEnv viendo la primera arena en directo.")
+    parser.add_argument("--timesteps", type=int, default=1000000)
+    parser.add_argument("--render-rate", type=float, default=30.0,
+                        help="Instantáneas por segundo enviadas a la ventana (0 para entrenar sin ventana)")
+    args = parser.parse_args()
+
+    # Inicializar el entorno: todas las arenas se mueven en un único paso vectorizado
+    env = PreyHunterVecEnv(NUM_ENVS)
+
+    # Crear un modelo A2C
+    model = A2C("MlpPolicy", env, verbose=1)
+
+    # La ventana vive en otro proceso: el entrenamiento solo le copia posiciones en memoria compartida
+    renderer = None
+    callback = None
+    if args.render_rate > 0:
+        renderer = AsyncRenderer(env.agent_positions(), caption="Prey vs Hunters")
+        callback = AsyncRenderCallback(renderer, env, rate=args.render_rate)
 
-    def _on_step(self) -> bool:
-        # Renderizar el entorno en cada paso
-        self.env.render()
-        return True
+    model.learn(total_timesteps=args.timesteps, callback=callback)
 
-# Inicializar el entorno
-env = PreyHunterEnv()
+    if renderer is not None:
+        renderer.close()
+    env.close()
 
-# Crear un modelo A2C
-model = A2C("MlpPolicy", env, verbose=1)
 
-# Entrenar el modelo y renderizar el entorno periódicamente
-model.learn(total_timesteps=1000000, callback=RenderCallback(env))
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,98 @@
-import time
+import argparse
+
 import pygame
 
 from stable_baselines3 import DQN
+from stable_baselines3.common.callbacks import CallbackList
 from stable_baselines3.common.env_checker import check_env
-from stable_baselines3.common.evaluation import evaluate_policy
 from stable_baselines3.common.monitor import Monitor
 
-
+from callbacks import AsyncCheckpointCallback, ParallelEvaluationCallback
+from checkpoints import CheckpointWriter, add_checkpoint_arguments, load_checkpoint
+from evaluation import ParallelEvaluator, format_report
 from hunters import HunterPreyEnv
 
-# Initialize Pygame
-pygame.init()
-screen = pygame.display.set_mode((800, 600))
+# The fixed-timestep loop lives next to the game, in game/pygame_extension.py
+import game_path  # noqa: F401
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
+
+
+# The evaluation workers re-import this module, so everything runs under main()
+def main():
+    parser = add_loop_arguments(argparse.ArgumentParser(description="Train the hunter"), 30, 30)
+    add_checkpoint_arguments(parser, "checkpoints/hunters")
+    parser.add_argument("--eval-workers", type=int, default=4,
+                        help="Processes used to evaluate the model at every checkpoint and after training")
+    # Evaluations during training block learning, so they stop earlier than the final one
+    parser.add_argument("--eval-min-episodes", type=int, default=8, help="Minimum episodes per checkpoint evaluation")
+    parser.add_argument("--eval-max-episodes", type=int, default=40, help="Maximum episodes per checkpoint evaluation")
+    parser.add_argument("--eval-tolerance", type=float, default=0.2,
+                        help="Checkpoint evaluations stop once the CI half-width is below this fraction of the mean")
+    args = parser.parse_args()
+
+    # Initialize Pygame
+    pygame.init()
+
+    # Create the environment (the window is opened on the first render, never in headless mode)
+    env = HunterPreyEnv(render_mode=None if args.headless else "human")
+    env = Monitor(env)
+    # Check that the environment follows the Gym API
+    check_env(env, warn=True)
+
+    # Initialize the DQN model, or pick it up where a checkpoint left it (step counter and RNG included)
+    if args.resume is not None:
+        model = load_checkpoint(DQN, args.resume or args.checkpoint_dir, env)
+    else:
+        model = DQN("MlpPolicy", env, verbose=1)
+
+    # Headless copies of the environment in worker processes: each evaluation runs until the mean reward is reliable
+    evaluator = ParallelEvaluator("hunters", workers=args.eval_workers)
+
+    # Train the model for 10000 steps in total, checkpointing from a background thread and
+    # evaluating in parallel on the same schedule (mean and confidence interval go to the logger)
+    callbacks = []
+    writer = None
+    if args.checkpoint_every:
+        writer = CheckpointWriter(args.checkpoint_dir, keep=args.keep_checkpoints)
+        callbacks.append(AsyncCheckpointCallback(writer, args.checkpoint_every, replay_buffer=args.save_replay_buffer))
+        callbacks.append(ParallelEvaluationCallback(evaluator, args.checkpoint_every, verbose=1,
+                                                    min_episodes=args.eval_min_episodes,
+                                                    max_episodes=args.eval_max_episodes,
+                                                    tolerance=args.eval_tolerance))
+    try:
+        model.learn(total_timesteps=10000 - model.num_timesteps, callback=CallbackList(callbacks),
+                    reset_num_timesteps=False)
+    finally:
+        # Also when learn raises or is interrupted: finish the checkpoint being written and stop the thread
+        if writer is not None:
+            writer.close()
+
+    # Save the trained model
+    model.save("hunter_prey_dqn")
 
-# Create the environment
-env = HunterPreyEnv()
-env = Monitor(env)
-# Check that the environment follows the Gym API
-check_env(env, warn=True)
+    # Final evaluation of the trained agent
+    print(format_report(evaluator.evaluate(model)))
+    evaluator.close()
 
-# Initialize the DQN model
-model = DQN("MlpPolicy", env, verbose=1)
+    # Test the trained agent (optional)
+    obs, info = env.reset()  # env.reset() devuelve una tupla (obs, info), pero solo necesitamos `obs`
 
-# Train the model for 10000 steps
-model.learn(total_timesteps=10000)
 
-# Save the trained model
-model.save("hunter_prey_dqn")
-clock = pygame.time.Clock()
+    def update():
+        nonlocal obs
+        action, _states = model.predict(obs)  # Pasa solo `obs` a model.predict()
+        obs, rewards, terminated, truncated, info = env.step(action)  # Paso en el entorno
 
-# Evaluate the trained agent
-mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=10)
-print(f"Mean reward: {mean_reward} +/- {std_reward}")
+        if terminated or truncated:
+            obs, info = env.reset()  # Al reiniciar, asegúrate de extraer solo `obs`
 
-# Test the trained agent (optional)
-obs, info = env.reset()  # env.reset() devuelve una tupla (obs, info), pero solo necesitamos `obs`
-for _ in range(10000):
-    env.render()  # Visualizar el progreso
+    # 10000 steps at a fixed tick rate; the view is rendered at its own rate (--tick-rate/--render-rate to adjust)
+    loop = FixedTimestepLoop(update, env.render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                             headless=args.headless)
+    loop.run(max_ticks=10000)
 
-    action, _states = model.predict(obs)  # Pasa solo `obs` a model.predict()
-    obs, rewards, terminated, truncated, info = env.step(action)  # Paso en el entorno
-    clock.tick(60)
-    time.sleep(0.02)  # Puedes ajustar este valor para pausar más o menos tiempo
+    pygame.quit()  # Quit pygame once done
 
-    if terminated or truncated:
-        obs, info = env.reset()  # Al reiniciar, asegúrate de extraer solo `obs`
 
-pygame.quit()  # Quit pygame once done
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Petición vacía que despierta al hilo de inferencia para que termine
+_STOP = object()
+
+
+class BatchedPolicy:
+    """Agrupar en lotes las predicciones de muchas sesiones sobre un mismo modelo de SB3.
+
+    Cada llamada a predict() encola su observación y espera. Un único hilo junta las
+    peticiones que llegan hasta llenar max_batch_size o hasta que la más antigua lleva
+    max_wait segundos esperando, y resuelve todo el lote con un solo model.predict.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait=0.002):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.predictions = 0
+        self.thread = threading.Thread(target=self._run, name="BatchedPolicy", daemon=True)
+        self.thread.start()
+
+    def submit(self, obs):
+        """Encolar una observación y devolver un Future con su acción."""
+        future = Future()
+        self.requests.put((np.asarray(obs), future))
+        return future
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        """Misma firma que model.predict para una observación; las predicciones son siempre deterministas."""
+        return self.submit(obs).result(), None
+
+    def mean_batch_size(self):
+        return self.predictions / self.batches if self.batches else 0.0
+
+    def close(self):
+        self.requests.put(_STOP)
+        self.thread.join()
+
+    def _collect(self):
+        """Esperar a la primera petición y juntar las que lleguen antes de max_wait o de llenar el lote."""
+        first = self.requests.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self.requests.put(_STOP)  # Terminar después de resolver este lote
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            observations = np.stack([obs for obs, _ in batch])
+            try:
+                actions, _ = self.model.predict(observations, deterministic=True)
+            except Exception as error:  # El error llega a cada sesión en lugar de matar el hilo
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            self.batches += 1
+            self.predictions += len(batch)
+            for (_, future), action in zip(batch, actions):
+                future.set_result(action)
+
+
+def _recv_exactly(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+class _PolicyRequestHandler(socketserver.BaseRequestHandler):
+    """Una sesión por conexión: recibe observaciones float32 en crudo y responde la acción."""
+
+    def handle(self):
+        server = self.server
+        obs_size = server.observation_shape_size * 4
+        while True:
+            data = _recv_exactly(self.request, obs_size)
+            if data is None:
+                return
+            obs = np.frombuffer(data, dtype=np.float32).reshape(server.observation_shape)
+            action = server.policy.submit(obs).result()
+            self.request.sendall(np.asarray(action, dtype=server.action_dtype).tobytes())
+
+
+class PolicyServer(socketserver.ThreadingTCPServer):
+    """Servidor TCP local que atiende muchas sesiones de juego con un BatchedPolicy compartido."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, policy):
+        self.policy = policy
+        self.observation_shape = policy.model.observation_space.shape
+        self.observation_shape_size = int(np.prod(self.observation_shape))
+        self.action_dtype = policy.model.action_space.dtype
+        super().__init__(address, _PolicyRequestHandler)
+
+
+class PolicyClient:
+    """Cliente de PolicyServer con la misma firma de predict que un modelo de SB3.
+
+    Los espacios son los del entorno de la sesión; tienen que coincidir con los del modelo.
+    """
+
+    def __init__(self, address, observation_space, action_space):
+        self.connection = socket.create_connection(address)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.action_space = action_space
+        self.action_size = int(np.prod(action_space.shape)) * action_space.dtype.itemsize
+        self.observation_space = observation_space
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        self.connection.sendall(np.asarray(obs, dtype=np.float32).tobytes())
+        data = _recv_exactly(self.connection, self.action_size)
+        if data is None:
+            raise ConnectionError("El servidor de inferencia cerró la conexión")
+        return np.frombuffer(data, dtype=self.action_space.dtype).reshape(self.action_space.shape), None
+
+    def close(self):
+        self.connection.close()
+
+
+def parse_address(address):
+    """Convertir "host:puerto" en una tupla (host, puerto)."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main():
+    from stable_baselines3 import DQN
+
+    parser = argparse.ArgumentParser(description="Servir un modelo entrenado a muchas sesiones con inferencia por lotes.")
+    parser.add_argument("--model", default="hunter_prey_dqn", help="Modelo DQN guardado")
+    parser.add_argument("--address", default="127.0.0.1:5555", help="host:puerto en el que escuchar")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Espera máxima para completar un lote")
+    args = parser.parse_args()
+
+    # El modelo se carga una sola vez y lo comparten todas las sesiones
+    policy = BatchedPolicy(DQN.load(args.model, device="cpu"), args.max_batch_size, args.max_wait_ms / 1000)
+    server = PolicyServer(parse_address(args.address), policy)
+    print(f"Sirviendo {args.model} en {args.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        policy.close()
+        print(f"{policy.predictions} predicciones en {policy.batches} lotes "
+              f"(lote medio {policy.mean_batch_size():.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import argparse
+import importlib.util
+import time
+import warnings
+
+import numpy as np
+
+# numba es opcional (sin él los entornos usan siempre el paso de NumPy) y solo se importa cuando
+# un entorno pide jit=True: importarlo cuesta ~250 ms y el paso de NumPy no lo necesita
+JIT_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Nombres de las funciones de este módulo que _compile_kernels sustituye por su versión compilada
+_KERNELS = []
+_compiled = False
+
+# Desplazamiento unitario por dirección: 0 arriba, 1 abajo, 2 izquierda, 3 derecha (como en preys.py y hunter_prey_vec.py)
+ACTION_DELTAS = np.array([[0.0, 1.0], [0.0, -1.0], [-1.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+
+
+def resolve_jit(jit):
+    """Si un entorno creado con jit=True puede usar los kernels compilados; avisa si falta numba."""
+    if jit and not JIT_AVAILABLE:
+        warnings.warn("numba no está instalado: se usa el paso de NumPy", RuntimeWarning, stacklevel=3)
+    if jit and JIT_AVAILABLE:
+        _compile_kernels()
+    return bool(jit) and JIT_AVAILABLE
+
+
+def _njit(function):
+    # Hasta _compile_kernels la función queda como Python puro; los entornos no la llaman sin jit
+    _KERNELS.append(function.__name__)
+    return function
+
+
+def _compile_kernels():
+    """Importar numba y sustituir cada kernel por su versión njit (se compila en la primera llamada).
+
+    Los kernels se llaman entre ellos por su nombre global, así que numba ve las versiones
+    compiladas al compilar el que los llama.
+    """
+    global _compiled
+    if _compiled:
+        return
+    import numba
+
+    for name in _KERNELS:
+        globals()[name] = numba.njit(cache=True)(globals()[name])
+    _compiled = True
+
+
+# Los kernels repiten las operaciones del paso de NumPy en el mismo orden y con los mismos
+# tipos (float32 donde NumPy trabaja en float32), así que las trayectorias son idénticas.
+
+# Elementos que NumPy convierte de tipo por tanda en una reducción con dtype (np.getbufsize() por defecto)
+REDUCE_BUFFER_SIZE = 8192
+
+
+@_njit
+def _block_sum(values, start, stop, zero):
+    """Suma de un bloque de hasta 128 valores, como el caso base de la suma por parejas de NumPy.
+
+    Se acumula en el tipo de zero (-0.0): float32 como arr.sum() o float64 como arr.sum(dtype=np.float64).
+    """
+    n = stop - start
+    if n < 8:
+        total = zero
+        for i in range(start, stop):
+            total += values[i]
+        return total
+    r = np.full(8, zero)
+    for j in range(8):
+        r[j] = values[start + j]
+    i = 8
+    while i < n - n % 8:
+        for j in range(8):
+            r[j] += values[start + i + j]
+        i += 8
+    total = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+    while i < n:
+        total += values[start + i]
+        i += 1
+    return total
+
+
+@_njit
+def _pairwise_sum(values, start, stop, zero):
+    """Suma de values[start:stop] con la suma por parejas de NumPy, acumulada en el tipo de zero.
+
+    NumPy parte recursivamente los tramos de más de 128 valores; aquí se recorre el mismo
+    árbol con una pila explícita (numba no puede cachear funciones recursivas).
+    """
+    tasks = np.empty((64, 3), dtype=np.intp)  # (inicio, fin, ya partido)
+    partials = np.full(64, zero)
+    num_tasks = 1
+    num_partials = 0
+    tasks[0, 0], tasks[0, 1], tasks[0, 2] = start, stop, 0
+    while num_tasks:
+        num_tasks -= 1
+        first, last, split = tasks[num_tasks]
+        n = last - first
+        if n <= 128:
+            partials[num_partials] = _block_sum(values, first, last, zero)
+            num_partials += 1
+        elif split:
+            num_partials -= 1
+            partials[num_partials - 1] += partials[num_partials]
+        else:
+            half = n // 2
+            half -= half % 8
+            tasks[num_tasks, 0], tasks[num_tasks, 1], tasks[num_tasks, 2] = first, last, 1
+            tasks[num_tasks + 1, 0], tasks[num_tasks + 1, 1], tasks[num_tasks + 1, 2] = first + half, last, 0
+            tasks[num_tasks + 2, 0], tasks[num_tasks + 2, 1], tasks[num_tasks + 2, 2] = first, first + half, 0
+            num_tasks += 3
+    return partials[0]
+
+
+@_njit
+def _blocked(occupancy, x, y, scale):
+    """Lectura de ObstacleGrid.blocked para una posición (scale es la resolución en el tipo de x e y)."""
+    if not (0 <= x <= 1 and 0 <= y <= 1):
+        return False
+    last = occupancy.shape[0] - 1
+    column = min(max(np.intp(x * scale), 0), last)
+    row = min(max(np.intp(y * scale), 0), last)
+    return occupancy[row, column]
+
+
+@_njit
+def _update_prey_distances(prey_pos, positions, offsets, distances):
+    for i in range(positions.shape[0]):
+        offsets[i, 0] = prey_pos[0] - positions[i, 0]
+        offsets[i, 1] = prey_pos[1] - positions[i, 1]
+        distances[i] = np.sqrt(offsets[i, 0] * offsets[i, 0] + offsets[i, 1] * offsets[i, 1])
+
+
+@_njit
+def prey_env_step(prey_pos, positions, num_hunters, directions, steps_until_change, uniforms, action,
+                  prey_speed, hunter_speed, capture_distance, occupancy, offsets, distances, observation):
+    """Paso completo de PreyEnv: prey, hunters, obstáculos, distancias, recompensa y observación.
+
+    Actualiza en su sitio posiciones, direcciones, cuentas atrás, offsets/distances (la caché
+    de _update_distances) y observation; devuelve (recompensa, terminado). uniforms trae un
+    uniforme por hunter para las direcciones nuevas. Las velocidades y capture_distance
+    llegan como float32, como las usa NumPy al operar con arrays float32.
+    """
+    scale = np.float32(occupancy.shape[0])
+
+    # Prey: escapar de los hunters cercanos o moverse según la acción
+    escape_x = np.float32(0.0)
+    escape_y = np.float32(0.0)
+    for i in range(num_hunters):
+        if distances[i] < np.float32(0.2):
+            distance = distances[i] + np.float32(1e-6)
+            escape_x += offsets[i, 0] / distance
+            escape_y += offsets[i, 1] / distance
+    escape_norm = np.sqrt(escape_x * escape_x + escape_y * escape_y)
+    if escape_norm > 0:
+        prey_pos[0] += escape_x / escape_norm * prey_speed
+        prey_pos[1] += escape_y / escape_norm * prey_speed
+    else:
+        prey_pos[0] += ACTION_DELTAS[action, 0] * prey_speed
+        prey_pos[1] += ACTION_DELTAS[action, 1] * prey_speed
+    prey_pos[0] = min(max(prey_pos[0], np.float32(0.0)), np.float32(1.0))
+    prey_pos[1] = min(max(prey_pos[1], np.float32(0.0)), np.float32(1.0))
+    _update_prey_distances(prey_pos, positions, offsets, distances)
+
+    # Hunters: perseguir al prey si está cerca o deambular cambiando de dirección cada 50 pasos
+    for i in range(num_hunters):
+        if distances[i] < np.float32(0.4):
+            step_x = offsets[i, 0] / distances[i]
+            step_y = offsets[i, 1] / distances[i]
+        else:
+            steps_until_change[i] -= 1
+            if steps_until_change[i] <= 0:
+                directions[i] = np.intp(uniforms[i] * 4)
+                steps_until_change[i] = 50
+            step_x = ACTION_DELTAS[directions[i], 0]
+            step_y = ACTION_DELTAS[directions[i], 1]
+        new_x = positions[i, 0] + step_x * hunter_speed
+        new_y = positions[i, 1] + step_y * hunter_speed
+        if not _blocked(occupancy, new_x, new_y, scale):
+            positions[i, 0] = new_x
+            positions[i, 1] = new_y
+        positions[i, 0] = min(max(positions[i, 0], np.float32(0.0)), np.float32(1.0))
+        positions[i, 1] = min(max(positions[i, 1], np.float32(0.0)), np.float32(1.0))
+    _update_prey_distances(prey_pos, positions, offsets, distances)
+
+    # Recompensa: distancia media a los hunters más un extra por cada obstáculo cercano
+    reward = np.float64(_pairwise_sum(distances, 0, num_hunters, np.float32(-0.0)) / np.float32(num_hunters))
+    near_obstacles = 0
+    for i in range(num_hunters, distances.shape[0]):
+        if distances[i] < np.float32(0.05):
+            near_obstacles += 1
+    reward += 0.1 * near_obstacles
+    terminated = False
+    for i in range(num_hunters):
+        if distances[i] < capture_distance:
+            terminated = True
+    if terminated:
+        reward -= 1.0
+
+    observation[0] = prey_pos[0]
+    observation[1] = prey_pos[1]
+    for i in range(num_hunters):
+        observation[2 + 2 * i] = positions[i, 0]
+        observation[3 + 2 * i] = positions[i, 1]
+    return reward, terminated
+
+
+@_njit
+def hunter_env_move(hunter_pos, prey_positions, prey_alive, distances, uniforms, action, hunter_speed, prey_speed,
+                    occupancy):
+    """Movimiento de HunterPreyEnv: hunter (con esquive de obstáculos), preys y distancias al hunter.
+
+    Devuelve False si el hunter sigue bloqueado tras esquivar (entonces nada se mueve).
+    uniforms trae 1 + 2 * preys uniformes: el del esquive y el paso aleatorio de cada prey.
+    distances queda como la deja _update_closest_prey (inf para los preys capturados).
+    """
+    scale = occupancy.shape[0]
+    new_x = hunter_pos[0]
+    new_y = hunter_pos[1]
+    if action == 0:
+        new_y += hunter_speed
+    elif action == 1:
+        new_y -= hunter_speed
+    elif action == 2:
+        new_x -= hunter_speed
+    elif action == 3:
+        new_x += hunter_speed
+
+    if _blocked(occupancy, new_x, new_y, scale):
+        adjustment = 0.1 if uniforms[0] < 0.5 else -0.1
+        if action == 0 or action == 1:
+            new_x += adjustment
+        else:
+            new_y += adjustment
+        if _blocked(occupancy, new_x, new_y, scale):
+            return False
+    hunter_pos[0] = min(max(new_x, 0.0), 1.0)
+    hunter_pos[1] = min(max(new_y, 0.0), 1.0)
+
+    for i in range(prey_positions.shape[0]):
+        prey_x = prey_positions[i, 0] + (uniforms[1 + 2 * i] - 0.5) * prey_speed
+        prey_y = prey_positions[i, 1] + (uniforms[2 + 2 * i] - 0.5) * prey_speed
+        if prey_alive[i] and not _blocked(occupancy, prey_x, prey_y, scale):
+            prey_positions[i, 0] = prey_x
+            prey_positions[i, 1] = prey_y
+        prey_positions[i, 0] = min(max(prey_positions[i, 0], np.float32(0.0)), np.float32(1.0))
+        prey_positions[i, 1] = min(max(prey_positions[i, 1], np.float32(0.0)), np.float32(1.0))
+
+        if prey_alive[i]:
+            dx = prey_positions[i, 0] - hunter_pos[0]
+            dy = prey_positions[i, 1] - hunter_pos[1]
+            distances[i] = np.sqrt(dx * dx + dy * dy)
+        else:
+            distances[i] = np.inf
+    return True
+
+
+@_njit
+def prey_hunter_step(positions, actions, speeds, num_preys, capture_distance, distances, prey_rewards, terminated):
+    """Paso de todas las arenas de PreyHunterBatch (modo denso) en una llamada.
+
+    Mueve y limita las posiciones (N, agentes, 2) en su sitio y escribe en los arrays del
+    batch la matriz de distancias (N, preys, hunters), la recompensa total de los preys por
+    arena y si hubo captura.
+    """
+    num_arenas, num_agents, _ = positions.shape
+    num_hunters = num_agents - num_preys
+    for n in range(num_arenas):
+        for a in range(num_agents):
+            for k in range(2):
+                value = positions[n, a, k] + ACTION_DELTAS[actions[n, a], k] * speeds[a]
+                positions[n, a, k] = min(max(value, np.float32(0.0)), np.float32(1.0))
+
+    pairs = num_preys * num_hunters
+    flat_distances = distances.reshape(num_arenas, pairs)
+    for n in range(num_arenas):
+        terminated[n] = False
+        for p in range(num_preys):
+            for h in range(num_hunters):
+                dx = positions[n, p, 0] - positions[n, num_preys + h, 0]
+                dy = positions[n, p, 1] - positions[n, num_preys + h, 1]
+                distance = np.sqrt(dx * dx + dy * dy)
+                distances[n, p, h] = distance
+                if distance < capture_distance:
+                    terminated[n] = True
+        # Como distances.sum(axis=(1, 2), dtype=np.float64): NumPy convierte a float64 por tandas de
+        # REDUCE_BUFFER_SIZE, suma cada tanda por parejas y acumula las tandas en orden. El redondeo
+        # depende del orden, así que se repite el mismo
+        total = np.float64(-0.0)
+        for start in range(0, pairs, REDUCE_BUFFER_SIZE):
+            total += _pairwise_sum(flat_distances[n], start, min(start + REDUCE_BUFFER_SIZE, pairs), np.float64(-0.0))
+        prey_rewards[n] = total
+
+
+def check_parity(steps=5000, seed=0):
+    """Jugar cada entorno con y sin jit con la misma semilla y acciones; devolver las diferencias y pasos/s."""
+    from hunter_prey import PreyHunterEnv
+    from hunters import HunterPreyEnv
+    from preys import PreyEnv
+
+    cases = {
+        "PreyEnv": lambda jit: PreyEnv(jit=jit),
+        "HunterPreyEnv": lambda jit: HunterPreyEnv(jit=jit),
+        "PreyHunterEnv": lambda jit: PreyHunterEnv(jit=jit),
+    }
+    results = {}
+    for name, make_env in cases.items():
+        runs = {}
+        for jit in (False, True):
+            env = make_env(jit)
+            env.action_space.seed(seed)
+            actions = [env.action_space.sample() for _ in range(steps)]
+            obs, _ = env.reset(seed=seed)
+            env.step(actions[0])  # Calentamiento (y compilación con jit)
+            obs, _ = env.reset(seed=seed)
+            trajectory = [obs]
+            rewards, dones = [], []
+            start = time.perf_counter()
+            for action in actions:
+                obs, reward, terminated, truncated, _ = env.step(action)
+                trajectory.append(obs)
+                rewards.append(reward)
+                dones.append(terminated)
+                if terminated or truncated:
+                    obs, _ = env.reset()
+                    trajectory.append(obs)
+            runs[jit] = (np.array(trajectory), np.array(rewards), np.array(dones),
+                         steps / (time.perf_counter() - start))
+        (obs_numpy, rewards_numpy, dones_numpy, speed_numpy), (obs_jit, rewards_jit, dones_jit, speed_jit) = runs.values()
+        identical = (obs_numpy.shape == obs_jit.shape and np.array_equal(obs_numpy, obs_jit)
+                     and np.array_equal(rewards_numpy, rewards_jit) and np.array_equal(dones_numpy, dones_jit))
+        results[name] = {"identical": identical, "numpy_steps_per_sec": speed_numpy, "jit_steps_per_sec": speed_jit}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobar que los kernels compilados dan las mismas trayectorias que NumPy.")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not JIT_AVAILABLE:
+        raise SystemExit("numba no está instalado")
+
+    failed = False
+    for name, result in check_parity(args.steps, args.seed).items():
+        failed |= not result["identical"]
+        print(f"{name:<14} {'idénticas' if result['identical'] else 'DISTINTAS':<10} "
+              f"numpy {result['numpy_steps_per_sec']:>9.0f} pasos/s  jit {result['jit_steps_per_sec']:>9.0f} pasos/s")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
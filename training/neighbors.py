@@ -0,0 +1,105 @@
+import numpy as np
+
+# Desplazamientos de las 3x3 celdas vecinas de una celda
+_NEIGHBOUR_OFFSETS = np.array([-1, 0, 1], dtype=np.intp)
+
+
+class CellList:
+    """Lista de celdas para buscar vecinos dentro de un radio en muchas arenas a la vez.
+
+    Las posiciones viven en [0, 1] y las celdas miden cutoff_radius, así que los vecinos de
+    un punto solo pueden estar en su celda o en las 8 de alrededor. rebuild() ordena las
+    entidades de todas las arenas por (arena, celda) con un argsort, y pairs() devuelve de
+    una vez todos los pares consulta-entidad a menos de cutoff_radius, sin recorrer los N x M.
+    """
+
+    def __init__(self, cutoff_radius):
+        self.cutoff_radius = cutoff_radius
+        self.columns = max(1, int(np.ceil(1 / cutoff_radius)))
+        self.cells_per_arena = self.columns * self.columns
+        self.num_entities = 0
+        self.positions = np.zeros((0, 2), dtype=np.float32)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_starts = np.zeros(1, dtype=np.intp)
+
+    def _cells(self, positions):
+        """Columna y fila de la celda de cada posición (las de borde, 1.0, van a la última celda)."""
+        cells = np.minimum((positions / self.cutoff_radius).astype(np.intp), self.columns - 1)
+        return cells[..., 0], cells[..., 1]
+
+    def rebuild(self, positions):
+        """Agrupar por celda las entidades de un array (arenas, entidades, 2)."""
+        num_arenas, self.num_entities = positions.shape[:2]
+        columns, rows = self._cells(positions)
+        arena_keys = np.arange(num_arenas)[:, None] * self.cells_per_arena
+        keys = (arena_keys + rows * self.columns + columns).ravel()
+        self.order = np.argsort(keys, kind='stable')
+        # cell_starts[k]:cell_starts[k + 1] es el trozo de order guardado en la celda k
+        self.cell_starts = np.searchsorted(keys[self.order], np.arange(num_arenas * self.cells_per_arena + 1))
+        self.positions = positions.reshape(-1, 2)
+
+    def pairs(self, queries):
+        """Pares (arena, consulta, entidad, distancia) a menos de cutoff_radius para un array (arenas, consultas, 2).
+
+        Las entidades son las del último rebuild, con el mismo número de arenas.
+        """
+        num_arenas, num_queries = queries.shape[:2]
+        columns, rows = self._cells(queries)
+
+        # Las 3x3 celdas alrededor de cada consulta que caen dentro de la arena
+        neighbour_columns = columns[:, :, None, None] + _NEIGHBOUR_OFFSETS[None, None, None, :]
+        neighbour_rows = rows[:, :, None, None] + _NEIGHBOUR_OFFSETS[None, None, :, None]
+        inside = ((neighbour_columns >= 0) & (neighbour_columns < self.columns)
+                  & (neighbour_rows >= 0) & (neighbour_rows < self.columns))
+        arena_keys = (np.arange(num_arenas) * self.cells_per_arena)[:, None, None, None]
+        keys = (arena_keys + neighbour_rows * self.columns + neighbour_columns)[inside]
+        query_indices = np.broadcast_to(np.arange(num_arenas * num_queries).reshape(num_arenas, num_queries, 1, 1),
+                                        inside.shape)[inside]
+
+        # Expandir cada celda en las entidades guardadas en ella
+        starts = self.cell_starts[keys]
+        counts = self.cell_starts[keys + 1] - starts
+        first_pair = np.repeat(np.cumsum(counts) - counts, counts)
+        entities = self.order[np.repeat(starts, counts) + np.arange(counts.sum()) - first_pair]
+        query_indices = np.repeat(query_indices, counts)
+
+        # Quedarse solo con los candidatos que están de verdad dentro del radio
+        diff = self.positions[entities] - queries.reshape(-1, 2)[query_indices]
+        distances = np.sqrt(np.einsum('ik,ik->i', diff, diff))
+        close = distances <= self.cutoff_radius
+        query_indices, entities = query_indices[close], entities[close]
+        return (query_indices // num_queries, query_indices % num_queries,
+                entities % self.num_entities, distances[close])
+
+
+def k_nearest(out, arenas, agents, offsets):
+    """Escribir en out (arenas, agentes, k, 3) los k vecinos más cercanos de cada agente.
+
+    arenas, agents y offsets describen una lista de pares agente-vecino ya ordenada de menor
+    a mayor distancia; offsets es (pares, 2), la posición del vecino relativa al agente. Cada
+    hueco de out recibe (dx, dy, 1); los huecos sin vecino quedan a cero.
+    """
+    out.fill(0)
+    groups = arenas * out.shape[1] + agents
+    # El orden estable mantiene dentro de cada agente el orden por distancia
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+
+    # Posición de cada par dentro de su grupo (0 = el vecino más cercano del agente)
+    rank = np.arange(groups.size) - np.searchsorted(groups, groups)
+    keep = rank < out.shape[2]
+    order, rank = order[keep], rank[keep]
+    out[arenas[order], agents[order], rank, :2] = offsets[order]
+    out[arenas[order], agents[order], rank, 2] = 1
+    return out
+
+
+def k_nearest_dense(out, distances, positions, neighbour_positions):
+    """Como k_nearest, pero a partir de la matriz completa de distancias (arenas, agentes, vecinos)."""
+    out.fill(0)
+    count = min(out.shape[2], distances.shape[2])
+    nearest = np.argsort(distances, axis=2)[:, :, :count]
+    neighbours = np.take_along_axis(neighbour_positions[:, None], nearest[..., None], axis=2)
+    out[:, :, :count, :2] = neighbours - positions[:, :, None]
+    out[:, :, :count, 2] = 1
+    return out
@@ -0,0 +1,154 @@
+import argparse
+import json
+
+import numpy as np
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "tanh": lambda x: np.tanh(x, out=x),
+}
+
+
+def _network_layers(modules):
+    """Convertir un nn.Sequential de SB3 en una lista de capas ("linear", W, b) o (activación,)."""
+    from torch import nn
+
+    layers = []
+    for module in modules:
+        if isinstance(module, nn.Sequential):
+            layers.extend(_network_layers(module))
+        elif isinstance(module, nn.Linear):
+            weight = module.weight.detach().cpu().numpy().astype(np.float32)
+            bias = module.bias.detach().cpu().numpy().astype(np.float32)
+            layers.append(("linear", weight.T.copy(), bias))
+        elif isinstance(module, nn.ReLU):
+            layers.append(("relu",))
+        elif isinstance(module, nn.Tanh):
+            layers.append(("tanh",))
+        else:
+            raise ValueError(f"Capa no soportada en la exportación: {type(module).__name__}")
+    return layers
+
+
+def export_policy(model, path):
+    """Guardar la red de un modelo DQN, A2C o PPO con MlpPolicy como un .npz sin dependencias de torch.
+
+    DQN guarda su q_net (la acción es el argmax de los Q); A2C y PPO la red de la política
+    seguida de action_net (la acción determinista es el modo de la distribución).
+    """
+    from gymnasium import spaces
+    from stable_baselines3 import DQN
+
+    if not isinstance(model.observation_space, spaces.Box):
+        raise ValueError("Solo se exportan políticas con observaciones Box")
+
+    policy = model.policy
+    if isinstance(model, DQN):
+        layers = _network_layers(policy.q_net.q_net)
+    else:
+        layers = _network_layers(policy.mlp_extractor.policy_net) + _network_layers([policy.action_net])
+
+    action_space = model.action_space
+    if isinstance(action_space, spaces.Discrete):
+        action = {"type": "discrete"}
+    elif isinstance(action_space, spaces.MultiDiscrete):
+        action = {"type": "multi_discrete", "nvec": action_space.nvec.tolist()}
+    elif isinstance(action_space, spaces.Box):
+        action = {"type": "box", "shape": list(action_space.shape),
+                  "low": action_space.low.tolist(), "high": action_space.high.tolist()}
+    else:
+        raise ValueError(f"Espacio de acciones no soportado: {action_space}")
+
+    arrays = {}
+    spec = []
+    for index, layer in enumerate(layers):
+        if layer[0] == "linear":
+            arrays[f"weight_{index}"], arrays[f"bias_{index}"] = layer[1], layer[2]
+        spec.append(layer[0])
+    metadata = {"layers": spec, "action": action, "observation_shape": list(model.observation_space.shape)}
+    np.savez(path, metadata=np.array(json.dumps(metadata)), **arrays)
+
+
+class NumpyPolicy:
+    """Forward de una política exportada con export_policy usando solo NumPy.
+
+    predict() tiene la firma de model.predict de SB3 y devuelve la misma acción que
+    model.predict(obs, deterministic=True).
+    """
+
+    def __init__(self, layers, action, observation_shape):
+        self.layers = layers
+        self.action = action
+        self.observation_shape = tuple(observation_shape)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            layers = [(name, data[f"weight_{index}"], data[f"bias_{index}"]) if name == "linear" else (name,)
+                      for index, name in enumerate(metadata["layers"])]
+        return cls(layers, metadata["action"], metadata["observation_shape"])
+
+    def forward(self, observations):
+        """Salida de la red (Q o logits/medias) para un lote de observaciones (B, *obs)."""
+        # Como el FlattenExtractor de SB3: cada observación se aplana antes de la primera capa
+        x = np.asarray(observations, dtype=np.float32).reshape(len(observations), -1)
+        for layer in self.layers:
+            if layer[0] == "linear":
+                x = x @ layer[1] + layer[2]
+            else:
+                ACTIVATIONS[layer[0]](x)
+        return x
+
+    def _actions(self, outputs):
+        kind = self.action["type"]
+        if kind == "discrete":
+            return outputs.argmax(axis=1)
+        if kind == "multi_discrete":
+            splits = np.cumsum(self.action["nvec"])[:-1]
+            return np.stack([logits.argmax(axis=1) for logits in np.split(outputs, splits, axis=1)], axis=1)
+        # Box: la media de la gaussiana, recortada a los límites del espacio como hace SB3
+        actions = outputs.reshape(-1, *self.action["shape"])
+        return np.clip(actions, np.array(self.action["low"], dtype=np.float32),
+                       np.array(self.action["high"], dtype=np.float32))
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        obs = np.asarray(obs, dtype=np.float32)
+        single = obs.shape == self.observation_shape
+        actions = self._actions(self.forward(obs.reshape(-1, *self.observation_shape)))
+        return (actions[0] if single else actions), None
+
+
+def check_policy(model, policy, num_observations=10000, seed=0):
+    """Número de observaciones aleatorias del espacio del modelo en las que ambas políticas difieren."""
+    space = model.observation_space
+    rng = np.random.default_rng(seed)
+    low = np.maximum(space.low, -10)
+    high = np.minimum(space.high, 10)
+    observations = rng.uniform(low, high, (num_observations, *space.shape)).astype(np.float32)
+    expected, _ = model.predict(observations, deterministic=True)
+    actions, _ = policy.predict(observations)
+    mismatched = ~np.isclose(actions, expected, atol=1e-5)
+    return int(mismatched.reshape(num_observations, -1).any(axis=1).sum())
+
+
+def main():
+    from stable_baselines3 import A2C, DQN, PPO
+
+    algos = {"dqn": DQN, "a2c": A2C, "ppo": PPO}
+    parser = argparse.ArgumentParser(description="Exportar un modelo de SB3 para jugar sin torch con NumpyPolicy.")
+    parser.add_argument("model", help="Modelo guardado (p. ej. hunter_prey_dqn.zip)")
+    parser.add_argument("--algo", choices=sorted(algos), default="dqn")
+    parser.add_argument("--output", default=None, help="Fichero .npz de salida (por defecto junto al modelo)")
+    args = parser.parse_args()
+
+    model = algos[args.algo].load(args.model, device="cpu")
+    output = args.output or f"{args.model.removesuffix('.zip')}.npz"
+    export_policy(model, output)
+
+    mismatches = check_policy(model, NumpyPolicy.load(output))
+    print(f"Política exportada a {output} ({mismatches} acciones distintas de model.predict en 10000 observaciones)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class ObstacleGrid:
+    """Rejilla de ocupación de la arena [0, 1] x [0, 1] con los obstáculos ya rasterizados.
+
+    Los obstáculos (círculos o una máscara con cualquier forma) se pintan una
+    vez, al crearlos, y comprobar si una posición está bloqueada pasa a ser una lectura del
+    array, vectorizada para cualquier número de posiciones. Una celda está ocupada si su
+    centro cae dentro de algún obstáculo, así que el borde es exacto hasta 1 / resolution.
+    """
+
+    def __init__(self, resolution=256):
+        self.resolution = resolution
+        # occupancy[fila, columna]: la fila es la coordenada y, la columna la x
+        self.occupancy = np.zeros((resolution, resolution), dtype=bool)
+        # Coordenadas escaladas e índices de celda por forma y tipo, reutilizados por blocked(..., out=...)
+        self.scratch = {}
+
+    def clear(self):
+        self.occupancy[:] = False
+
+    def add_circles(self, centers, radius):
+        """Pintar círculos de radio radius centrados en un array (obstáculos, 2), todos a la vez."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        if not len(centers):
+            return
+        # Recuadro de celdas alrededor de cada centro que puede tocar el círculo
+        span = int(np.ceil(radius * self.resolution)) + 1
+        offsets = np.arange(-span, span + 1)
+        base = np.floor(centers * self.resolution).astype(np.intp)
+        columns = base[:, 0, None, None] + offsets[None, None, :]
+        rows = base[:, 1, None, None] + offsets[None, :, None]
+        dx = (columns + 0.5) / self.resolution - centers[:, 0, None, None]
+        dy = (rows + 0.5) / self.resolution - centers[:, 1, None, None]
+        covered = ((dx * dx + dy * dy < radius * radius)
+                   & (columns >= 0) & (columns < self.resolution) & (rows >= 0) & (rows < self.resolution))
+        rows, columns = np.broadcast_arrays(rows, columns)
+        self.occupancy[rows[covered], columns[covered]] = True
+
+    def add_mask(self, mask):
+        """Pintar una máscara booleana (filas, columnas) que cubre toda la arena, con cualquier forma."""
+        mask = np.asarray(mask, dtype=bool)
+        centers = (np.arange(self.resolution) + 0.5) / self.resolution
+        rows = (centers * mask.shape[0]).astype(np.intp)
+        columns = (centers * mask.shape[1]).astype(np.intp)
+        self.occupancy |= mask[rows[:, None], columns[None, :]]
+
+    def blocked(self, positions, out=None):
+        """Si cada posición de un array (..., 2) está dentro de un obstáculo.
+
+        Fuera de la arena [0, 1] x [0, 1] no hay obstáculos: los entornos comprueban la posición
+        nueva antes de recortarla a la arena, y no debe bloquearla el obstáculo de la celda del
+        borde. Con out (bool, de la forma de positions sin el último eje) el resultado se escribe
+        ahí y los intermedios salen de arrays reutilizados: no se asigna memoria por llamada.
+        """
+        if out is None:
+            positions = np.asarray(positions)
+            cells = np.clip((positions * self.resolution).astype(np.intp), 0, self.resolution - 1)
+            inside = ((positions >= 0) & (positions <= 1)).all(axis=-1)
+            return self.occupancy[cells[..., 1], cells[..., 0]] & inside
+
+        key = (out.shape, positions.dtype)
+        if key not in self.scratch:
+            self.scratch[key] = (np.empty((*out.shape, 2), dtype=positions.dtype),
+                                 np.empty((*out.shape, 2), dtype=np.intp), np.empty(out.shape, dtype=np.intp),
+                                 np.empty((*out.shape, 2), dtype=bool), np.empty((*out.shape, 2), dtype=bool))
+        scaled, cells, flat, inside, below_end = self.scratch[key]
+        np.multiply(positions, self.resolution, out=scaled)
+        np.copyto(cells, scaled, casting="unsafe")  # Trunca como astype(np.intp)
+        np.clip(cells, 0, self.resolution - 1, out=cells)
+        np.multiply(cells[..., 1], self.resolution, out=flat)
+        flat += cells[..., 0]
+        np.take(self.occupancy.reshape(-1), flat, out=out, mode="clip")
+        np.greater_equal(positions, 0, out=inside)
+        np.less_equal(positions, 1, out=below_end)
+        inside &= below_end
+        out &= inside[..., 0]
+        out &= inside[..., 1]
+        return out
@@ -3,188 +3,270 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 
-WIDTH = 800
-HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+import kernels
+from obstacle_grid import ObstacleGrid
+from profiling import PhaseProfiler
+from random_buffer import RandomBuffer
+from rendering import WIDTH, HEIGHT, RENDER_MODES, Renderer, occupancy_surface
+
+# Desplazamiento unitario por dirección: 0 arriba, 1 abajo, 2 izquierda, 3 derecha
+ACTION_DELTAS = np.array([[0.0, 1.0], [0.0, -1.0], [-1.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+
+# Distancia a la posición de un obstáculo a partir de la cual los hunters quedan bloqueados
+OBSTACLE_RADIUS = 0.05
 
 
 class PreyEnv(gym.Env):
     """Entorno para entrenar a los preys a alejarse del cazador."""
+    metadata = {'render_modes': RENDER_MODES, 'render_fps': 30}
 
-    def __init__(self):
+    def __init__(self, num_hunters=5, num_obstacles=2, render_mode=None, profile=False, obstacle_map=None,
+                 grid_resolution=256, prey_speed=0.03, hunter_speed=0.01, capture_distance=0.05, jit=False,
+                 reuse_obs=False):
         super(PreyEnv, self).__init__()
-
+        self.profiler = PhaseProfiler(enabled=profile)
+        # jit=True: el paso entero en un kernel compilado con numba (si está instalado), con las mismas trayectorias
+        self.jit = kernels.resolve_jit(jit)
+        # reuse_obs=True: step y reset devuelven siempre el mismo array de observación, que el paso
+        # siguiente sobrescribe; solo para quien la copia de todas formas (p. ej. SharedMemoryVecEnv)
+        self.reuse_obs = reuse_obs
+        # Toda la aleatoriedad sale de self.np_random por bloques; reset(seed=...) la hace repetible
+        self.random = RandomBuffer(self.np_random)
+        self.render_mode = render_mode
+        self.renderer = Renderer(render_mode, caption="Prey vs Hunter")
+
+        self.num_hunters = num_hunters  # Número de hunters
         self.action_space = spaces.Discrete(4)  # Acciones del prey
-        self.observation_space = spaces.Box(low=-1, high=1, shape=(12,),
-                                            dtype=np.float32)  # 2 para el prey y 2*3 para los hunters
-
-        self.prey_pos = np.random.rand(2).astype(np.float32)
-        self.num_hunters = 5  # Número de hunters
-        self.hunter_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_hunters)]
-
-        self.num_obstacles = 2
-        self.obstacle_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_obstacles)]
-        self.prey_speed = 0.03
-        self.hunter_speed = 0.01
-        self.hunter_directions = [np.random.choice([0, 1, 2, 3]) for _ in
-                                  range(self.num_hunters)]  # Direcciones iniciales aleatorias
-        self.steps_until_change = [50 for _ in
-                                   range(self.num_hunters)]  # Cada hunter cambiará su dirección cada 50 pasos
-
-    def _check_collision(self, pos):
-        """Verificar si la nueva posición colisiona con algún obstáculo."""
-        for obstacle_pos in self.obstacle_positions:
-            if np.linalg.norm(pos - obstacle_pos) < 0.05:
-                return True
-        return False
+        self.observation_space = spaces.Box(low=-1, high=1, shape=(2 + 2 * num_hunters,),
+                                            dtype=np.float32)  # 2 para el prey y 2 por cada hunter
+
+        self.prey_pos = self.random.random(2).astype(np.float32)
+
+        # Hunters y obstáculos comparten un array (H + O, 2): las distancias del prey a todos ellos
+        # salen de una sola resta broadcast por paso (ver _update_distances)
+        self.num_obstacles = num_obstacles
+        self.positions = self.random.random((self.num_hunters + self.num_obstacles, 2)).astype(np.float32)
+        self.hunter_positions = self.positions[:self.num_hunters]
+        self.obstacle_positions = self.positions[self.num_hunters:]
+
+        # Los obstáculos se rasterizan en una rejilla al crearlos; obstacle_map (imagen booleana,
+        # filas = y) añade obstáculos fijos de cualquier forma, p. ej. un laberinto
+        self.obstacle_map = obstacle_map
+        self.obstacle_grid = ObstacleGrid(grid_resolution)
+        self.obstacle_map_surface = None
+        self._bake_obstacles()
+        self.prey_speed = prey_speed
+        self.hunter_speed = hunter_speed
+        self.capture_distance = capture_distance  # Un hunter más cerca que esto atrapa al prey
+        self.hunter_directions = self.random.integers(4, self.num_hunters)  # Direcciones iniciales aleatorias
+        self.steps_until_change = np.full(self.num_hunters, 50)  # Cada hunter cambiará su dirección cada 50 pasos
+        self.observation = np.empty(self.observation_space.shape, dtype=np.float32)
+
+        # Caché de distancias y arrays de trabajo del paso: se reservan aquí y el paso los
+        # sobrescribe con operaciones in-place y out=, sin asignar memoria nueva
+        self.offsets = np.empty_like(self.positions)
+        self.distances = np.empty(len(self.positions), dtype=np.float32)
+        self.hunter_offsets = self.offsets[:self.num_hunters]
+        self.hunter_distances = self.distances[:self.num_hunters]
+        self.obstacle_distances = self.distances[self.num_hunters:]
+        self._squares = np.empty_like(self.positions)
+        self._hunter_steps = np.empty((self.num_hunters, 2), dtype=np.float32)
+        self._escape_steps = np.empty((self.num_hunters, 2), dtype=np.float32)
+        self._escape = np.empty(2, dtype=np.float32)
+        self._padded_distances = np.empty(self.num_hunters, dtype=np.float32)
+        self._new_directions = np.empty(self.num_hunters)
+        self._chasing, self._wandering, self._change, self._movable, self._near, self._captured = (
+            np.empty(self.num_hunters, dtype=bool) for _ in range(6))
+        self._near_obstacles = np.empty(self.num_obstacles, dtype=bool)
+        self._update_distances()
+
+    def _update_distances(self):
+        """Recalcular los vectores y distancias del prey a cada hunter y obstáculo.
+
+        Escape, persecución, recompensa y terminación leen esta caché en lugar de recalcular
+        normas; hay que llamarla cada vez que se mueve el prey o algún hunter. Se escribe en
+        los mismos arrays en cada llamada (igual que np.linalg.norm(offsets, axis=1)).
+        """
+        # Por columnas: restar un vector a cada fila haría que NumPy reservara un buffer intermedio
+        for axis in range(2):
+            np.subtract(self.prey_pos[axis], self.positions[:, axis], out=self.offsets[:, axis])
+        np.multiply(self.offsets, self.offsets, out=self._squares)
+        np.add(self._squares[:, 0], self._squares[:, 1], out=self.distances)
+        np.sqrt(self.distances, out=self.distances)
+
+    def _bake_obstacles(self):
+        """Pintar los obstáculos actuales (y obstacle_map) en la rejilla de ocupación."""
+        self.obstacle_grid.clear()
+        self.obstacle_grid.add_circles(self.obstacle_positions, OBSTACLE_RADIUS)
+        if self.obstacle_map is not None:
+            self.obstacle_grid.add_mask(self.obstacle_map)
 
     def _move_hunters_randomly_or_towards_prey(self):
-        """Mover a cada hunter aleatoriamente o hacia el prey si está cerca."""
-        for i in range(self.num_hunters):
-            direction_to_prey = self.prey_pos - self.hunter_positions[i]
-            distance_to_prey = np.linalg.norm(direction_to_prey)
-
-            # Si el prey está dentro de un rango cercano, mover hacia él
-            if distance_to_prey < 0.4:
-                direction = direction_to_prey / distance_to_prey  # Normalizar la dirección
-                new_hunter_pos = self.hunter_positions[i] + direction * self.hunter_speed
-            else:
-                # Movimiento aleatorio si el prey está lejos
-                self.steps_until_change[i] -= 1
-                if self.steps_until_change[i] <= 0:
-                    self.hunter_directions[i] = np.random.choice([0, 1, 2, 3])
-                    self.steps_until_change[i] = 50  # Reiniciar el número de pasos
-
-                new_hunter_pos = np.copy(self.hunter_positions[i])
-                if self.hunter_directions[i] == 0:  # Mover hacia arriba
-                    new_hunter_pos[1] += self.hunter_speed
-                elif self.hunter_directions[i] == 1:  # Mover hacia abajo
-                    new_hunter_pos[1] -= self.hunter_speed
-                elif self.hunter_directions[i] == 2:  # Mover hacia la izquierda
-                    new_hunter_pos[0] -= self.hunter_speed
-                elif self.hunter_directions[i] == 3:  # Mover hacia la derecha
-                    new_hunter_pos[0] += self.hunter_speed
-
-            # Verificar colisión con los obstáculos
-            if not self._check_collision(new_hunter_pos):
-                self.hunter_positions[i] = new_hunter_pos  # Mover solo si no hay colisión
-
-            # Asegurarse de que el hunter se mantenga dentro de los límites del mapa
-            self.hunter_positions[i] = np.clip(self.hunter_positions[i], 0, 1)
+        """Mover a todos los hunters aleatoriamente o hacia el prey si está cerca."""
+        direction_to_prey = self.hunter_offsets
+        distance_to_prey = self.hunter_distances
+
+        # Si el prey está dentro de un rango cercano, mover hacia él
+        chasing = np.less(distance_to_prey, 0.4, out=self._chasing)
+
+        # Movimiento aleatorio si el prey está lejos: la cuenta atrás solo avanza para los que deambulan
+        wandering = np.logical_not(chasing, out=self._wandering)
+        np.subtract(self.steps_until_change, 1, out=self.steps_until_change, where=wandering)
+        change = np.less_equal(self.steps_until_change, 0, out=self._change)
+        change &= wandering
+        # Un uniforme por hunter en cada paso, cambie o no de dirección: así el kernel compilado consume lo mismo
+        uniforms = self.random.random(self.num_hunters)
+        np.multiply(uniforms, 4, out=self._new_directions)
+        np.copyto(self.hunter_directions, self._new_directions, casting="unsafe", where=change)  # Trunca como astype
+        np.copyto(self.steps_until_change, 50, where=change)  # Reiniciar el número de pasos
+
+        step = np.take(ACTION_DELTAS, self.hunter_directions, axis=0, out=self._hunter_steps, mode="clip")
+        # Normalizar la dirección hacia el prey de los que persiguen
+        np.divide(direction_to_prey, distance_to_prey[:, None], out=step, where=chasing[:, None])
+        step *= self.hunter_speed
+        new_hunter_positions = np.add(step, self.hunter_positions, out=step)
+
+        # Verificar colisión con los obstáculos y mover solo a los hunters que no colisionan
+        movable = self.obstacle_grid.blocked(new_hunter_positions, out=self._movable)
+        np.logical_not(movable, out=movable)
+        np.copyto(self.hunter_positions, new_hunter_positions, where=movable[:, None])
+
+        # Asegurarse de que los hunters se mantengan dentro de los límites del mapa
+        np.clip(self.hunter_positions, 0, 1, out=self.hunter_positions)
 
     def reset(self, seed=None, options=None):
         """Reiniciar el entorno."""
         super().reset(seed=seed)
-
-        self.prey_pos = np.random.rand(2).astype(np.float32)
-        self.hunter_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_hunters)]
-        self.obstacle_positions = [np.random.rand(2).astype(np.float32) for _ in range(self.num_obstacles)]
+        if seed is not None:
+            self.random = RandomBuffer(self.np_random)
+
+        self.prey_pos[:] = self.random.random(2)
+        self.positions[:] = self.random.random((self.num_hunters + self.num_obstacles, 2))
+        self.hunter_directions[:] = self.random.integers(4, self.num_hunters)
+        self.steps_until_change[:] = 50
+        self._bake_obstacles()
+        self._update_distances()
         return self._get_observation(), {}
 
     def step(self, action):
         """Ejecutar un paso del entorno."""
+        if self.jit:
+            with self.profiler.phase("compiled_step"):
+                reward, terminated = kernels.prey_env_step(
+                    self.prey_pos, self.positions, self.num_hunters, self.hunter_directions, self.steps_until_change,
+                    self.random.random(self.num_hunters), int(action), np.float32(self.prey_speed),
+                    np.float32(self.hunter_speed), np.float32(self.capture_distance), self.obstacle_grid.occupancy,
+                    self.offsets, self.distances, self.observation)
+            return self.observation if self.reuse_obs else self.observation.copy(), reward, terminated, False, {}
 
-        # Movimiento del prey basado en la acción (si no hay cazadores cerca)
-        move_x, move_y = 0, 0
-        if action == 0:  # Mover hacia arriba
-            move_y = self.prey_speed
-        elif action == 1:  # Mover hacia abajo
-            move_y = -self.prey_speed
-        elif action == 2:  # Mover hacia la izquierda
-            move_x = -self.prey_speed
-        elif action == 3:  # Mover hacia la derecha
-            move_x = self.prey_speed
+        with self.profiler.phase("prey_movement"):
+            self._move_prey(action)
 
-        # Detectar proximidad de los cazadores
-        escape_vector = np.zeros(2, dtype=np.float32)  # Vector de escape
+        # Mover a los hunters aleatoriamente o hacia el prey si están cerca (ya quedan limitados a [0, 1])
+        with self.profiler.phase("hunters"):
+            self._move_hunters_randomly_or_towards_prey()
 
-        for hunter_pos in self.hunter_positions:
-            direction_to_prey = self.prey_pos - hunter_pos
-            distance_to_hunter = np.linalg.norm(direction_to_prey)
+        with self.profiler.phase("distances"):
+            self._update_distances()
 
-            # Si algún cazador está cerca (por ejemplo, a menos de 0.2 de distancia), calcular vector de escape
-            if distance_to_hunter < 0.2:
-                escape_vector += direction_to_prey / (distance_to_hunter + 1e-6)  # Normalizar y sumar
+        with self.profiler.phase("reward"):
+            # Recompensa por alejarse de los hunters (promedio de las distancias a los hunters)
+            reward = float(self.hunter_distances.mean())  # Más lejos de los hunters es mejor para el prey
 
-        # Si existe un vector de escape (es decir, hay hunters cerca), moverse en esa dirección
-        if np.linalg.norm(escape_vector) > 0:
-            # Normalizar el vector de escape para mover el prey
-            escape_vector /= np.linalg.norm(escape_vector)
-            self.prey_pos += escape_vector * self.prey_speed
-        else:
-            # Movimiento normal si no hay cazadores cerca
-            self.prey_pos[0] += move_x
-            self.prey_pos[1] += move_y
+            # Recompensa adicional por mantenerse cerca de los obstáculos
+            reward += 0.1 * np.count_nonzero(np.less(self.obstacle_distances, 0.05, out=self._near_obstacles))
 
-        # Limitar la posición del prey a un rango más limitado (márgenes de seguridad)
-        self.prey_pos = np.clip(self.prey_pos, 0, 1)
+            # Condición de terminación: si algún cazador atrapa al prey
+            terminated = bool(np.less(self.hunter_distances, self.capture_distance, out=self._captured).any())
 
-        # Mover a los hunters aleatoriamente o hacia el prey si están cerca
-        self._move_hunters_randomly_or_towards_prey()
+            if terminated:
+                reward -= 1.0  # Penalización significativa si el prey es atrapado
 
-        # Limitar la posición de los hunters a un rango más limitado
-        for i in range(self.num_hunters):
-            self.hunter_positions[i] = np.clip(self.hunter_positions[i], 0, 1)
+        truncated = False  # No estamos implementando truncamiento basado en tiempo
 
-        # Recompensa por alejarse de los hunters (promedio de las distancias a los hunters)
-        total_distance_to_hunters = sum(
-            [np.linalg.norm(self.prey_pos - hunter_pos) for hunter_pos in self.hunter_positions])
-        reward = total_distance_to_hunters / self.num_hunters  # Más lejos de los hunters es mejor para el prey
+        # Obtener la observación actualizada
+        with self.profiler.phase("observation"):
+            obs = self._get_observation()
 
-        # Recompensa adicional por mantenerse cerca de los obstáculos
-        for obstacle_pos in self.obstacle_positions:
-            distance_to_obstacle = np.linalg.norm(self.prey_pos - obstacle_pos)
-            if distance_to_obstacle < 0.05:
-                reward += 0.1
+        return obs, reward, terminated, truncated, {}
 
-        # Condición de terminación: si algún cazador atrapa al prey
-        terminated = any(np.linalg.norm(self.prey_pos - hunter_pos) < 0.05 for hunter_pos in self.hunter_positions)
+    def _move_prey(self, action):
+        """Mover el prey según la acción, o alejarlo de los cazadores que estén cerca."""
+        # Detectar proximidad de los cazadores (distancias del final del paso anterior, nada se ha movido desde entonces)
+        direction_to_prey = self.hunter_offsets
+        distance_to_hunter = self.hunter_distances
 
-        if terminated:
-            reward -= 1.0  # Penalización significativa si el prey es atrapado
+        # Si algún cazador está cerca (por ejemplo, a menos de 0.2 de distancia), calcular vector de escape
+        near = np.less(distance_to_hunter, 0.2, out=self._near)
+        np.add(distance_to_hunter, 1e-6, out=self._padded_distances)
+        np.divide(direction_to_prey, self._padded_distances[:, None], out=self._escape_steps)
+        escape_vector = np.sum(self._escape_steps, axis=0, where=near[:, None], out=self._escape)
 
-        truncated = False  # No estamos implementando truncamiento basado en tiempo
+        # Si existe un vector de escape (es decir, hay hunters cerca), moverse en esa dirección
+        escape_norm = np.linalg.norm(escape_vector)
+        if escape_norm > 0:
+            # Normalizar el vector de escape para mover el prey
+            escape_vector /= escape_norm
+            escape_vector *= self.prey_speed
+            self.prey_pos += escape_vector
+        else:
+            # Movimiento normal si no hay cazadores cerca, según la acción
+            self.prey_pos += np.multiply(ACTION_DELTAS[action], self.prey_speed, out=self._escape)
 
-        # Obtener la observación actualizada
-        obs = self._get_observation()
+        # Limitar la posición del prey a un rango más limitado (márgenes de seguridad)
+        np.clip(self.prey_pos, 0, 1, out=self.prey_pos)
+        self._update_distances()  # Los hunters persiguen según la nueva posición del prey
 
-        return obs, reward, terminated, truncated, {}
+    def agent_positions(self):
+        """Posiciones actuales por grupo de agentes (para grabar y reproducir trayectorias)."""
+        return {"preys": self.prey_pos[None], "hunters": self.hunter_positions, "obstacles": self.obstacle_positions}
+
+    def get_phase_stats(self):
+        """Tiempo acumulado y llamadas por fase del step (vacío salvo con profile=True)."""
+        return self.profiler.stats()
 
     def _get_observation(self):
-        """Obtener la observación (posición del prey y de todos los hunters)."""
-        return np.concatenate([self.prey_pos] + self.hunter_positions).astype(np.float32)
+        """Obtener la observación (posición del prey y de todos los hunters), escrita en self.observation."""
+        self.observation[:2] = self.prey_pos
+        self.observation[2:] = self.hunter_positions.ravel()
+        return self.observation if self.reuse_obs else self.observation.copy()
 
     def render(self):
-        """Render the environment for visualization using Pygame."""
-
-        # Inicializar Pygame si no lo has hecho antes
-        if not hasattr(self, 'screen'):
-            pygame.init()
-            self.screen = pygame.display.set_mode((800, 600))  # Tamaño de la ventana
-            pygame.display.set_caption("Prey vs Hunter")
+        """Render the environment for visualization using Pygame according to render_mode."""
+        if self.render_mode is None:
+            return None
+        screen = self.renderer.get_surface()
 
         # Limpiar la pantalla con un fondo blanco
-        self.screen.fill((255, 255, 255))
+        screen.fill((255, 255, 255))
 
         # Escalar las posiciones (convertir de [0.1, 0.9] a píxeles en la pantalla, con márgenes)
         def scale_position(pos):
-            x = int(0.8 * 800 * (pos[0] - 0.1)) + 80  # Mantener un margen de 10% en los bordes
-            y = int(0.8 * 600 * (pos[1] - 0.1)) + 60
+            x = int(0.8 * WIDTH * (pos[0] - 0.1)) + 80  # Mantener un margen de 10% en los bordes
+            y = int(0.8 * HEIGHT * (pos[1] - 0.1)) + 60
             return x, y
 
         # Dibujar al prey (cuadrado verde)
         prey_x, prey_y = scale_position(self.prey_pos)
-        pygame.draw.rect(self.screen, (0, 255, 0), (prey_x, prey_y, 20, 20))
+        pygame.draw.rect(screen, (0, 255, 0), (prey_x, prey_y, 20, 20))
 
         # Dibujar a todos los cazadores (cuadrados rojos)
         for hunter_pos in self.hunter_positions:
             hunter_x, hunter_y = scale_position(hunter_pos)
-            pygame.draw.rect(self.screen, (255, 0, 0), (hunter_x, hunter_y, 20, 20))
-
-        # Dibujar los obstáculos (cuadrados grises)
+            pygame.draw.rect(screen, (255, 0, 0), (hunter_x, hunter_y, 20, 20))
+
+        # Dibujar el mapa de obstáculos, si lo hay, y los obstáculos (cuadrados grises)
+        if self.obstacle_map is not None:
+            if self.obstacle_map_surface is None:
+                self.obstacle_map_surface = occupancy_surface(np.asarray(self.obstacle_map, dtype=bool),
+                                                              (int(0.8 * WIDTH), int(0.8 * HEIGHT)))
+            screen.blit(self.obstacle_map_surface, scale_position((0, 0)))
         for obstacle_pos in self.obstacle_positions:
             obstacle_x, obstacle_y = scale_position(obstacle_pos)
-            pygame.draw.rect(self.screen, (128, 128, 128), (obstacle_x, obstacle_y, 20, 20))
+            pygame.draw.rect(screen, (128, 128, 128), (obstacle_x, obstacle_y, 20, 20))
+
+        # Actualizar la pantalla (o devolver el frame)
+        return self.renderer.present()
 
-        # Actualizar la pantalla
-        pygame.display.flip()
\ No newline at end of file
+    def close(self):
+        self.renderer.close()
\ No newline at end of file
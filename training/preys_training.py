@@ -1,32 +1,54 @@
-import time
-import pygame
+import argparse
 
 from stable_baselines3 import DQN
+
+from callbacks import AsyncCheckpointCallback
+from checkpoints import CheckpointWriter, add_checkpoint_arguments, load_checkpoint
 from preys import PreyEnv
 
-# Crear el entorno de entrenamiento para los preys
-env = PreyEnv()
+# El bucle de paso fijo vive junto al juego, en game/pygame_extension.py
+import game_path  # noqa: F401
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
 
-# Entrenar el modelo DQN para que los preys aprendan a mantenerse alejados
-model = DQN("MlpPolicy", env, verbose=1)
-model.learn(total_timesteps=1000)
+parser = add_loop_arguments(argparse.ArgumentParser(description="Entrenar a los preys"), 30, 30)
+args = add_checkpoint_arguments(parser, "checkpoints/preys", every_steps=250).parse_args()
+
+# Crear el entorno de entrenamiento para los preys
+env = PreyEnv(render_mode=None if args.headless else "human")
+
+# Entrenar el modelo DQN para que los preys aprendan a mantenerse alejados,
+# o retomarlo desde un checkpoint con su contador de pasos y sus generadores aleatorios
+if args.resume is not None:
+    model = load_checkpoint(DQN, args.resume or args.checkpoint_dir, env)
+else:
+    model = DQN("MlpPolicy", env, verbose=1)
+
+# Los checkpoints se escriben desde un hilo aparte mientras sigue el entrenamiento
+callback = writer = None
+if args.checkpoint_every:
+    writer = CheckpointWriter(args.checkpoint_dir, keep=args.keep_checkpoints)
+    callback = AsyncCheckpointCallback(writer, args.checkpoint_every, replay_buffer=args.save_replay_buffer)
+try:
+    model.learn(total_timesteps=1000 - model.num_timesteps, callback=callback, reset_num_timesteps=False)
+finally:
+    # También si learn falla o se interrumpe: termina el checkpoint en curso y para el hilo
+    if writer is not None:
+        writer.close()
 
 # Guardar el modelo entrenado
 model.save("prey_dqn_model")
 
 
-clock = pygame.time.Clock()
-
-# En tu bucle principal, asegúrate de limitar los FPS
-for _ in range(1000):
+def update():
     action = env.action_space.sample()
     obs, reward, terminated, truncated, info = env.step(action)
-
-    env.render()
-
-    # Limitar la velocidad de renderizado a 30 FPS
-    clock.tick(30)
     done = terminated or truncated
 
     if done:
         env.reset()
+
+
+# Simular 1000 pasos a tick fijo; el render va a su propio ritmo (o no hay render en modo headless)
+loop = FixedTimestepLoop(update, env.render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                         headless=args.headless)
+loop.run(max_ticks=1000)
@@ -0,0 +1,57 @@
+import contextlib
+import time
+from collections import defaultdict
+
+# Context manager vacío compartido: con el profiler apagado una fase cuesta una llamada y un with
+_DISABLED_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.total_time[self.name] += time.perf_counter() - self.start
+        self.profiler.calls[self.name] += 1
+
+
+class PhaseProfiler:
+    """Tiempo acumulado y número de llamadas por fase del step de un entorno.
+
+    Uso: `with self.profiler.phase("movement"): ...`. Si no está activado, phase() devuelve
+    un context manager vacío y no se mide nada.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.total_time = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def phase(self, name):
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return _Phase(self, name)
+
+    def stats(self):
+        """Diccionario fase -> {"calls", "total_s"}."""
+        return {name: {"calls": self.calls[name], "total_s": self.total_time[name]} for name in self.total_time}
+
+    def reset(self):
+        self.total_time.clear()
+        self.calls.clear()
+
+
+def merge_phase_stats(stats_list):
+    """Sumar las estadísticas por fase de varios entornos."""
+    merged = defaultdict(lambda: {"calls": 0, "total_s": 0.0})
+    for stats in stats_list:
+        for name, phase in stats.items():
+            merged[name]["calls"] += phase["calls"]
+            merged[name]["total_s"] += phase["total_s"]
+    return dict(merged)
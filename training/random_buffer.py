@@ -0,0 +1,35 @@
+import math
+
+import numpy as np
+
+
+class RandomBuffer:
+    """Números aleatorios de un Generator sacados por bloques en lugar de uno a uno.
+
+    Cada llamada toma su trozo de un bloque de block_size uniformes en [0, 1) pregenerado
+    con rng.random y solo vuelve a llamar al Generator cuando el bloque se agota. Con el
+    mismo Generator (misma semilla) la secuencia es siempre la misma. Los arrays devueltos
+    son vistas del bloque: no hay que modificarlos.
+    """
+
+    def __init__(self, rng, block_size=4096):
+        self.rng = rng
+        self.block_size = block_size
+        self.block = np.empty(0)
+        self.position = 0
+
+    def random(self, size=None):
+        """Uniformes en [0, 1) con la forma size (un float si size es None)."""
+        count = 1 if size is None else math.prod(size) if isinstance(size, tuple) else int(size)
+        if self.position + count > self.block.size:
+            self.block = self.rng.random(max(self.block_size, count))
+            self.position = 0
+        values = self.block[self.position:self.position + count]
+        self.position += count
+        return float(values[0]) if size is None else values.reshape(size)
+
+    def integers(self, high, size=None):
+        """Enteros en [0, high) con la forma size (un int si size es None)."""
+        if size is None:
+            return int(self.random() * high)
+        return (self.random(size) * high).astype(np.intp)
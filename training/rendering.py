@@ -0,0 +1,78 @@
+import numpy as np
+import pygame
+
+WIDTH = 800
+HEIGHT = 600
+
+RENDER_MODES = ["human", "rgb_array"]
+
+# Color de cada grupo de agent_positions(); los grupos desconocidos se dibujan en azul
+GROUP_COLORS = {"preys": (0, 255, 0), "hunters": (255, 0, 0), "obstacles": (128, 128, 128)}
+
+
+def draw_agents(surface, agent_positions):
+    """Dibujar sobre fondo blanco las posiciones por grupo de agent_positions() (las NaN se omiten)."""
+    surface.fill((255, 255, 255))
+    for name, positions in agent_positions.items():
+        color = GROUP_COLORS.get(name, (0, 0, 255))
+        for x, y in positions[~np.isnan(positions).any(axis=1)]:
+            pygame.draw.rect(surface, color, (int(x * WIDTH), int(y * HEIGHT), 20, 20))
+
+
+def occupancy_surface(occupancy, size, color=(128, 128, 128)):
+    """Superficie de tamaño size con las celdas ocupadas de una rejilla (filas = y) pintadas y el resto transparente."""
+    pixels = np.zeros((occupancy.shape[1], occupancy.shape[0], 3), dtype=np.uint8)
+    pixels[occupancy.T] = color  # surfarray indexa por (x, y)
+    surface = pygame.surfarray.make_surface(pixels)
+    surface.set_colorkey((0, 0, 0))
+    return pygame.transform.scale(surface, size)
+
+
+class Renderer:
+    """Superficie de dibujo para un entorno según su render_mode de gymnasium.
+
+    - None: no se dibuja nada y nunca se toca el display.
+    - "rgb_array": se dibuja en una Surface fuera de pantalla y se devuelve el frame como array (alto, ancho, 3).
+    - "human": la ventana se crea la primera vez que se renderiza.
+    """
+
+    def __init__(self, render_mode=None, caption="", size=(WIDTH, HEIGHT)):
+        if render_mode is not None and render_mode not in RENDER_MODES:
+            raise ValueError(f"render_mode debe ser None o uno de {RENDER_MODES}, no {render_mode!r}")
+        self.render_mode = render_mode
+        self.caption = caption
+        self.size = size
+        self.surface = None
+        self.font = None
+
+    def get_surface(self):
+        """Devolver la superficie donde dibujar, creándola (y la ventana en modo "human") si hace falta."""
+        if self.surface is None:
+            if self.render_mode == "human":
+                pygame.display.init()
+                self.surface = pygame.display.set_mode(self.size)
+                pygame.display.set_caption(self.caption)
+            else:
+                self.surface = pygame.Surface(self.size)
+        return self.surface
+
+    def get_font(self, size=36):
+        """Fuente por defecto, inicializada solo cuando se usa."""
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont(None, size)
+        return self.font
+
+    def present(self):
+        """Mostrar la ventana en modo "human" o devolver el frame dibujado en modo "rgb_array"."""
+        if self.render_mode == "human":
+            # Procesar la cola de eventos para que la ventana no se congele (sin consumirlos)
+            pygame.event.pump()
+            pygame.display.flip()
+            return None
+        return np.transpose(pygame.surfarray.array3d(self.surface), axes=(1, 0, 2))
+
+    def close(self):
+        if self.render_mode == "human" and self.surface is not None:
+            pygame.display.quit()
+        self.surface = None
@@ -0,0 +1,95 @@
+import argparse
+import sys
+
+import numpy as np
+import pygame
+
+from rendering import Renderer, draw_agents
+from trajectory import Trajectory
+
+# El bucle de paso fijo vive junto al juego, en game/pygame_extension.py
+import game_path  # noqa: F401
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
+
+# Saltos de las flechas arriba/abajo, en frames
+JUMP = 100
+
+parser = add_loop_arguments(argparse.ArgumentParser(description="Reproducir una trayectoria grabada con TrajectoryRecorder"),
+                            30, 30)
+parser.add_argument("directory", help="Directorio de la trayectoria")
+parser.add_argument("--start", type=int, default=0, help="Frame en el que empezar (negativo cuenta desde el final)")
+parser.add_argument("--paused", action="store_true", help="Empezar en pausa")
+args = parser.parse_args()
+
+trajectory = Trajectory(args.directory)
+if not len(trajectory):
+    sys.exit(f"{args.directory} no tiene frames")
+
+index = args.start % len(trajectory)
+playing = not args.paused
+
+
+def seek(frame):
+    global index
+    index = int(np.clip(frame, 0, len(trajectory) - 1))
+
+
+def seek_episode(offset):
+    """Saltar al inicio del episodio actual + offset."""
+    episode = int(np.clip(trajectory.episode_of(index) + offset, 0, len(trajectory.episode_start_indices) - 1))
+    seek(trajectory.episode_start_indices[episode])
+
+
+KEYS = {
+    pygame.K_RIGHT: lambda: seek(index + 1),
+    pygame.K_LEFT: lambda: seek(index - 1),
+    pygame.K_UP: lambda: seek(index + JUMP),
+    pygame.K_DOWN: lambda: seek(index - JUMP),
+    pygame.K_PAGEUP: lambda: seek_episode(1),
+    pygame.K_PAGEDOWN: lambda: seek_episode(-1),
+    pygame.K_HOME: lambda: seek(0),
+    pygame.K_END: lambda: seek(len(trajectory) - 1),
+}
+
+
+def update():
+    # Un frame grabado por tick mientras se reproduce; sin ventana se recorre todo y se termina
+    global playing
+    if not playing:
+        return
+    if index == len(trajectory) - 1:
+        playing = False
+        if args.headless:
+            loop.stop()
+        return
+    seek(index + 1)
+
+
+def render():
+    global playing
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            loop.stop()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                playing = not playing
+            elif event.key in KEYS:
+                KEYS[event.key]()
+
+    screen = renderer.get_surface()
+    draw_agents(screen, trajectory.agent_positions(index))
+
+    status = (f"{trajectory.env}  frame {index}/{len(trajectory) - 1}  episodio {trajectory.episode_of(index)}  "
+              f"recompensa {trajectory.rewards[index]:.3f}{'  done' if trajectory.dones[index] else ''}")
+    screen.blit(renderer.get_font(24).render(status, True, (0, 0, 0)), (10, 10))
+    renderer.present()
+
+
+renderer = Renderer(None if args.headless else "human", caption=f"Replay {args.directory}")
+loop = FixedTimestepLoop(update, render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                         headless=args.headless)
+loop.run()
+renderer.close()
+
+episodes = len(trajectory.episode_start_indices)
+print(f"{len(trajectory)} frames, {episodes} episodios, recompensa total {trajectory.rewards.sum(dtype=np.float64):.3f}")
@@ -0,0 +1,132 @@
+import argparse
+import os
+import time
+
+import gymnasium as gym
+import numpy as np
+from stable_baselines3 import A2C, PPO
+from stable_baselines3.common.monitor import Monitor
+
+from hunter_prey import PreyHunterParallelEnv
+from numpy_policy import NumpyPolicy, export_policy
+from shared_memory_vec_env import SharedMemoryVecEnv
+
+ALGOS = {
+    "a2c": A2C,
+    "ppo": PPO,
+}
+
+OPPONENTS = {"preys": "hunters", "hunters": "preys"}
+
+
+class PreyHunterTeamEnv(gym.Env):
+    """Un equipo de PreyHunterParallelEnv como entorno de un solo agente para SB3.
+
+    El otro equipo lo juega una instantánea congelada de su política (un .npz de
+    numpy_policy.py, cargado con set_opponent) o, mientras no haya ninguna, acciones
+    aleatorias. Los episodios se cortan a los max_episode_steps pasos.
+    """
+    metadata = PreyHunterParallelEnv.metadata
+
+    def __init__(self, team, opponent_path=None, max_episode_steps=500, **env_kwargs):
+        super(PreyHunterTeamEnv, self).__init__()
+        self.team = team
+        self.opponent_team = OPPONENTS[team]
+        self.parallel_env = PreyHunterParallelEnv(**env_kwargs)
+        self.observation_space = self.parallel_env.observation_space(team)
+        self.action_space = self.parallel_env.action_space(team)
+        self.opponent_action_space = self.parallel_env.action_space(self.opponent_team)
+        self.max_episode_steps = max_episode_steps
+        self.steps = 0
+        self.opponent = None
+        self.opponent_observation = None
+        self.set_opponent(opponent_path)
+
+    def set_opponent(self, path):
+        """Cambiar la política del otro equipo (None para jugar con acciones aleatorias)."""
+        self.opponent = NumpyPolicy.load(path) if path is not None else None
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        if seed is not None:
+            self.opponent_action_space.seed(seed)
+        observations, _ = self.parallel_env.reset(seed=seed, options=options)
+        self.opponent_observation = observations[self.opponent_team]
+        self.steps = 0
+        return observations[self.team], {}
+
+    def step(self, action):
+        if self.opponent is None:
+            opponent_action = self.opponent_action_space.sample()
+        else:
+            opponent_action, _ = self.opponent.predict(self.opponent_observation)
+        observations, rewards, terminations, _, _ = self.parallel_env.step(
+            {self.team: action, self.opponent_team: opponent_action})
+        self.opponent_observation = observations[self.opponent_team]
+        self.steps += 1
+        truncated = self.steps >= self.max_episode_steps
+        return observations[self.team], rewards[self.team], terminations[self.team], truncated, {}
+
+    def close(self):
+        self.parallel_env.close()
+
+
+def make_team_env(team, env_kwargs):
+    """Crear el entorno de un equipo envuelto en Monitor (para los workers)."""
+    return Monitor(PreyHunterTeamEnv(team, **env_kwargs))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Entrenar una política de preys y otra de hunters una contra otra.")
+    parser.add_argument("--algo", choices=sorted(ALGOS), default="ppo")
+    parser.add_argument("--workers", type=int, default=4, help="Procesos de simulación por equipo")
+    parser.add_argument("--timesteps", type=int, default=200000, help="Pasos de entrenamiento por equipo")
+    parser.add_argument("--swap-steps", type=int, default=20000,
+                        help="Pasos que entrena cada equipo antes de pasar su instantánea al rival")
+    parser.add_argument("--num-preys", type=int, default=3)
+    parser.add_argument("--num-hunters", type=int, default=3)
+    parser.add_argument("--cutoff-radius", type=float, default=None)
+    parser.add_argument("--k-nearest", type=int, default=None)
+    parser.add_argument("--max-episode-steps", type=int, default=500)
+    parser.add_argument("--output", default="self_play", help="Directorio de modelos e instantáneas")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output, exist_ok=True)
+    env_kwargs = {"num_preys": args.num_preys, "num_hunters": args.num_hunters, "cutoff_radius": args.cutoff_radius,
+                  "k_nearest": args.k_nearest, "max_episode_steps": args.max_episode_steps}
+
+    # Cada equipo entrena en sus propios procesos; las políticas rivales viajan como .npz sin torch
+    envs = {team: SharedMemoryVecEnv([lambda team=team: make_team_env(team, env_kwargs)
+                                      for _ in range(args.workers)])
+            for team in OPPONENTS}
+    models = {team: ALGOS[args.algo]("MlpPolicy", envs[team], verbose=0, device="cpu") for team in OPPONENTS}
+
+    start = time.perf_counter()
+    rounds = int(np.ceil(args.timesteps / args.swap_steps))
+    for round_index in range(rounds):
+        for team, model in models.items():
+            model.learn(total_timesteps=args.swap_steps, reset_num_timesteps=False)
+
+            # Instantánea de la política recién entrenada para el equipo rival
+            snapshot = os.path.join(args.output, f"{team}_{round_index:04d}.npz")
+            export_policy(model, snapshot)
+            envs[OPPONENTS[team]].env_method("set_opponent", snapshot)
+
+            episode_rewards = [info["r"] for info in model.ep_info_buffer]
+            mean_reward = np.mean(episode_rewards) if episode_rewards else float("nan")
+            print(f"Ronda {round_index + 1}/{rounds} {team:<7} {model.num_timesteps} pasos, "
+                  f"recompensa media por episodio {mean_reward:.2f}")
+
+    elapsed = time.perf_counter() - start
+    for team, model in models.items():
+        model.save(os.path.join(args.output, f"{team}_{args.algo}"))
+        envs[team].close()
+    total = sum(model.num_timesteps for model in models.values())
+    print(f"Total: {total} pasos en {elapsed:.1f} s ({total / elapsed:.0f} pasos/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import multiprocessing as mp
+import time
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+
+def _shared_array(ctx, shape, dtype):
+    """Reservar un array de NumPy respaldado por memoria compartida entre procesos."""
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray('b', max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return raw, shape, dtype
+
+
+def _as_array(buffer):
+    raw, shape, dtype = buffer
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _worker(remote, parent_remote, env_fn_wrapper, index, buffers):
+    """Proceso que ejecuta un entorno leyendo acciones y escribiendo resultados en memoria compartida."""
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    observations, actions, rewards, dones, worker_stats = (_as_array(buffer) for buffer in buffers)
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                start = time.perf_counter()
+                observation, reward, terminated, truncated, info = env.step(actions[index].copy())
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                reset_info = {}
+                if done:
+                    # Guardar la observación final (copiada: con reuse_obs reset la sobrescribe), luego reiniciar
+                    info["terminal_observation"] = observation.copy()
+                    observation, reset_info = env.reset()
+                observations[index] = observation
+                rewards[index] = reward
+                dones[index] = done
+                worker_stats[index, 0] += 1
+                worker_stats[index, 1] += time.perf_counter() - start
+                # Por la tubería solo viajan los infos (normalmente vacíos)
+                remote.send((info, reset_info))
+            elif cmd == "reset":
+                maybe_options = {"options": data[1]} if data[1] else {}
+                observation, reset_info = env.reset(seed=data[0], **maybe_options)
+                observations[index] = observation
+                remote.send(reset_info)
+            elif cmd == "render":
+                remote.send(env.render())
+            elif cmd == "close":
+                env.close()
+                remote.close()
+                break
+            elif cmd == "env_method":
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == "has_attr":
+                try:
+                    env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class SharedMemoryVecEnv(SubprocVecEnv):
+    """SubprocVecEnv que intercambia observaciones, acciones, recompensas y dones por memoria compartida.
+
+    Cada entorno corre en su propio proceso. Los arrays viven en buffers compartidos, así que por las
+    tuberías solo viajan el comando y los infos del paso. También lleva la cuenta de pasos y tiempo
+    de simulación de cada worker (ver worker_steps_per_second).
+    """
+
+    def __init__(self, env_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+        num_envs = len(env_fns)
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        # Crear un entorno temporal para conocer los espacios y dimensionar los buffers
+        probe_env = env_fns[0]()
+        observation_space, action_space = probe_env.observation_space, probe_env.action_space
+        probe_env.close()
+        if not isinstance(observation_space, spaces.Box):
+            raise ValueError(f"SharedMemoryVecEnv solo soporta observaciones Box, no {observation_space}")
+
+        buffers = (
+            _shared_array(ctx, (num_envs,) + observation_space.shape, observation_space.dtype),
+            _shared_array(ctx, (num_envs,) + action_space.shape, action_space.dtype),
+            _shared_array(ctx, (num_envs,), np.float32),
+            _shared_array(ctx, (num_envs,), np.bool_),
+            _shared_array(ctx, (num_envs, 2), np.float64),
+        )
+        self.observations, self.actions, self.rewards, self.dones, self.worker_stats = (
+            _as_array(buffer) for buffer in buffers)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(num_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(self.work_remotes, self.remotes, env_fns)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), index, buffers)
+            # daemon=True: si el proceso principal falla, los workers no se quedan colgados
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        super(SubprocVecEnv, self).__init__(num_envs, observation_space, action_space)
+
+    def step_async(self, actions):
+        self.actions[:] = np.asarray(actions).reshape(self.actions.shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        infos, self.reset_infos = zip(*results)
+        return self.observations.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+    def reset(self):
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(("reset", (self._seeds[env_idx], self._options[env_idx])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        # Las semillas y opciones solo se usan una vez
+        self._reset_seeds()
+        self._reset_options()
+        return self.observations.copy()
+
+    def worker_steps_per_second(self):
+        """Pasos por segundo de simulación de cada worker (sin contar la espera del learner)."""
+        steps, busy_time = self.worker_stats[:, 0], self.worker_stats[:, 1]
+        return np.divide(steps, busy_time, out=np.zeros_like(steps), where=busy_time > 0)
@@ -0,0 +1,199 @@
+import argparse
+import ast
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+# Distribuciones de la búsqueda aleatoria: nombre:bajo:alto
+DISTRIBUTIONS = {
+    "uniform": lambda rng, low, high: float(rng.uniform(low, high)),
+    "loguniform": lambda rng, low, high: float(np.exp(rng.uniform(np.log(low), np.log(high)))),
+    "randint": lambda rng, low, high: int(rng.integers(low, high + 1)),
+}
+
+
+def parse_value(text):
+    """Interpretar un valor de la línea de comandos como literal de Python (número, None, tupla...) o texto."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_param(text):
+    """Separar "nombre=a,b,c" (rejilla) o "nombre=uniform:bajo:alto" (aleatorio) en (nombre, especificación)."""
+    name, _, values = text.partition("=")
+    if not values or not (name == "timesteps" or name.startswith(("env.", "algo."))):
+        raise argparse.ArgumentTypeError(f"{text!r}: se espera env.<arg>=..., algo.<arg>=... o timesteps=...")
+    kind, _, bounds = values.partition(":")
+    if kind in DISTRIBUTIONS:
+        low, _, high = bounds.partition(":")
+        return name, (kind, parse_value(low), parse_value(high))
+    return name, [parse_value(value) for value in values.split(",")]
+
+
+def grid_trials(params):
+    """Todas las combinaciones de los valores de cada parámetro."""
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+
+
+def random_trials(params, samples, seed):
+    """samples combinaciones: las distribuciones se muestrean y las listas se eligen al azar."""
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(samples):
+        trial = {}
+        for name, spec in params.items():
+            if isinstance(spec, tuple):
+                trial[name] = DISTRIBUTIONS[spec[0]](rng, spec[1], spec[2])
+            else:
+                trial[name] = spec[rng.integers(len(spec))]
+        trials.append(trial)
+    return trials
+
+
+def trial_config(base, params):
+    """Configuración completa de un ensayo: base (entorno, algoritmo, evaluación...) más sus parámetros."""
+    config = dict(base, env_kwargs={}, algo_kwargs={})
+    for name, value in params.items():
+        if name == "timesteps":
+            config["timesteps"] = value
+        else:
+            group, _, key = name.partition(".")
+            config[f"{group}_kwargs"][key] = value
+    return config
+
+
+def config_hash(config):
+    """Clave de caché de una configuración: no depende del orden de los parámetros."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _init_worker(threads):
+    # Presupuesto de CPU: cada ensayo usa como mucho threads hilos de torch
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def run_trial(config, path):
+    """Entrenar y evaluar una configuración y guardar su resultado en path (un .json de la caché)."""
+    from stable_baselines3.common.evaluation import evaluate_policy
+    from stable_baselines3.common.monitor import Monitor
+
+    from callbacks import CpuBudgetCallback
+    from evaluation import confidence_half_width, make_eval_env
+    from train import ALGOS, make_env
+
+    start = time.perf_counter()
+    env = make_env(config["env"], **config["env_kwargs"])
+    model = ALGOS[config["algo"]]("MlpPolicy", env, seed=config["seed"], device="cpu", **config["algo_kwargs"])
+    budget = CpuBudgetCallback(config["cpu_seconds"])
+    model.learn(total_timesteps=config["timesteps"], callback=budget)
+    train_time = time.perf_counter() - start
+
+    eval_env = Monitor(make_eval_env(config["env"], config["max_episode_steps"], **config["env_kwargs"]))
+    eval_env.reset(seed=config["seed"])
+    returns, lengths = evaluate_policy(model, eval_env, n_eval_episodes=config["eval_episodes"],
+                                       return_episode_rewards=True)
+    env.close()
+    eval_env.close()
+
+    result = {
+        "config": config,
+        "mean_return": float(np.mean(returns)),
+        "half_width": confidence_half_width(returns),
+        "mean_length": float(np.mean(lengths)),
+        "timesteps": model.num_timesteps,
+        "budget_exhausted": budget.exhausted,
+        "train_time": train_time,
+        "wall_time": time.perf_counter() - start,
+    }
+    # Escribir y renombrar: un ensayo interrumpido nunca deja un resultado a medias en la caché
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(result, file, indent=2)
+    os.replace(f"{path}.tmp", path)
+    return result
+
+
+def parse_args():
+    from train import ALGOS, ENVS
+
+    parser = argparse.ArgumentParser(
+        description="Barrer parámetros del entorno e hiperparámetros del algoritmo con una caché de resultados.",
+        epilog="Ejemplos: --param env.hunter_speed=0.05,0.1 --param algo.learning_rate=loguniform:1e-5:1e-3 "
+               "--param timesteps=10000,50000")
+    parser.add_argument("--env", choices=sorted(ENVS), default="hunters")
+    parser.add_argument("--algo", choices=sorted(ALGOS), default="dqn")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NOMBRE=VALORES",
+                        help="Lista a,b,c (rejilla) o uniform/loguniform/randint:bajo:alto (aleatorio); se repite")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="Búsqueda aleatoria con este número de ensayos (por defecto, rejilla completa)")
+    parser.add_argument("--timesteps", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4, help="Ensayos a la vez")
+    parser.add_argument("--threads", type=int, default=1, help="Hilos de torch por ensayo")
+    parser.add_argument("--cpu-seconds", type=float, default=None,
+                        help="Tiempo de CPU máximo de entrenamiento por ensayo (se corta antes de --timesteps)")
+    parser.add_argument("--eval-episodes", type=int, default=10)
+    parser.add_argument("--max-episode-steps", type=int, default=1000)
+    parser.add_argument("--cache", default="sweep_cache", help="Directorio de resultados por ensayo")
+    args = parser.parse_args()
+
+    params = dict(args.param)
+    if args.samples is None and any(isinstance(spec, tuple) for spec in params.values()):
+        parser.error("las distribuciones solo sirven con --samples")
+    return args, params
+
+
+def main():
+    args, params = parse_args()
+    base = {"env": args.env, "algo": args.algo, "timesteps": args.timesteps, "seed": args.seed,
+            "cpu_seconds": args.cpu_seconds, "eval_episodes": args.eval_episodes,
+            "max_episode_steps": args.max_episode_steps}
+    trials = grid_trials(params) if args.samples is None else random_trials(params, args.samples, args.seed)
+    configs = [trial_config(base, trial) for trial in trials]
+
+    os.makedirs(args.cache, exist_ok=True)
+    results = []
+    pending = {}
+    for config in configs:
+        path = os.path.join(args.cache, f"{config_hash(config)}.json")
+        if os.path.exists(path):
+            with open(path) as file:
+                results.append(json.load(file))
+        elif path not in pending:
+            pending[path] = config
+    print(f"{len(configs)} ensayos: {len(results)} en caché, {len(pending)} por ejecutar")
+
+    start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+    with concurrent.futures.ProcessPoolExecutor(args.workers, mp_context=mp.get_context(start_method),
+                                                initializer=_init_worker, initargs=(args.threads,)) as pool:
+        futures = {pool.submit(run_trial, config, path): config for path, config in pending.items()}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as error:  # Un ensayo que falla no para el barrido
+                print(f"Falló {futures[future]}: {error!r}")
+                continue
+            results.append(result)
+            print(f"[{len(results)}/{len(configs)}] {result['mean_return']:.3f} +/- {result['half_width']:.3f} "
+                  f"en {result['wall_time']:.1f} s: {result['config']['env_kwargs']} {result['config']['algo_kwargs']}")
+
+    print("Mejores ensayos:")
+    for result in sorted(results, key=lambda result: -result["mean_return"])[:10]:
+        config = result["config"]
+        budget = " (presupuesto agotado)" if result["budget_exhausted"] else ""
+        print(f"{result['mean_return']:>9.3f} +/- {result['half_width']:<7.3f} {result['timesteps']:>8} pasos{budget} "
+              f"{config['env_kwargs']} {config['algo_kwargs']}")
+
+
+if __name__ == "__main__":
+    main()
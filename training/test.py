@@ -1,38 +1,60 @@
-import pygame
+import argparse
 
-from stable_baselines3 import DQN
+import pygame
 
 from hunters import HunterPreyEnv
+from inference_server import PolicyClient, parse_address
+from numpy_policy import NumpyPolicy
+from trajectory import TrajectoryRecorder
+
+# El bucle de paso fijo vive junto al juego, en game/pygame_extension.py
+import game_path  # noqa: F401
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
 
-# Cargar el modelo entrenado
-model = DQN.load("hunter_prey_dqn")
+parser = add_loop_arguments(argparse.ArgumentParser(description="Probar el hunter entrenado"), 30, 30)
+parser.add_argument("--server", metavar="HOST:PORT", help="Pedir las acciones a inference_server.py en vez de cargar el modelo")
+parser.add_argument("--numpy-policy", metavar="NPZ",
+                    help="Política exportada con numpy_policy.py; juega sin importar torch ni stable_baselines3")
+parser.add_argument("--record", metavar="DIR", help="Grabar la partida en DIR para verla con replay.py")
+args = parser.parse_args()
 
 # Inicializar Pygame
 pygame.init()
-screen = pygame.display.set_mode((800, 600))
 
-# Crear el entorno
-env = HunterPreyEnv()
+# Crear el entorno (la ventana se abre en el primer render; sin ventana en modo headless)
+env = HunterPreyEnv(render_mode=None if args.headless else "human")
+if args.record:
+    env = TrajectoryRecorder(env, args.record)
+
+# Cargar el modelo entrenado, o usar el servidor de inferencia compartido entre sesiones
+if args.server:
+    model = PolicyClient(parse_address(args.server), env.observation_space, env.action_space)
+elif args.numpy_policy:
+    model = NumpyPolicy.load(args.numpy_policy)
+else:
+    from stable_baselines3 import DQN  # Solo aquí: importar torch cuesta segundos de arranque
+
+    model = DQN.load("hunter_prey_dqn")
 
 # Reiniciar el entorno para obtener la primera observación
 obs, info = env.reset()
 
-clock = pygame.time.Clock()
 
-# En el bucle principal, agrega control de FPS:
-for _ in range(1000):
-    # Lógica del juego
+def update():
+    # Lógica del juego: un paso del entorno por tick de simulación
+    global obs
     action, _states = model.predict(obs, deterministic=True)
     obs, reward, terminated, truncated, info = env.step(action)
 
-    # Renderizar el entorno para visualizarlo
-    env.render()
-
-    # Limitar la velocidad del bucle a 30 FPS
-    clock.tick(30)
-
     if terminated or truncated:
         obs, info = env.reset()
 
+
+# Simular 1000 pasos a tick fijo, renderizando a su propio ritmo
+loop = FixedTimestepLoop(update, env.render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                         headless=args.headless)
+loop.run(max_ticks=1000)
+
 # Cerrar Pygame después de la prueba
-pygame.quit()
\ No newline at end of file
+env.close()  # Con --record, escribe los metadatos de la grabación
+pygame.quit()
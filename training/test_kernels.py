@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import kernels
+
+
+def test_numpy_path_does_not_import_numba():
+    # En un proceso aparte: en este otro test puede haber importado numba ya
+    code = ("import sys; import hunter_prey, hunters, preys; "
+            "hunters.HunterPreyEnv().step(0); preys.PreyEnv().step(0); hunter_prey.PreyHunterEnv().step([0] * 6); "
+            "assert 'numba' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+
+@pytest.mark.skipif(not kernels.JIT_AVAILABLE, reason="numba no está instalado")
+def test_jit_trajectories_match_numpy():
+    results = kernels.check_parity(steps=2000)
+    assert {name: result["identical"] for name, result in results.items()} == dict.fromkeys(results, True)
+
+
+@pytest.mark.skipif(not kernels.JIT_AVAILABLE, reason="numba no está instalado")
+def test_prey_rewards_sum_like_numpy():
+    # Distancias de muchos órdenes de magnitud: el redondeo del total depende del orden de la suma
+    kernels.resolve_jit(True)
+    rng = np.random.default_rng(0)
+    for num_preys, num_hunters in [(3, 2), (40, 90), (100, 100)]:
+        positions = (rng.random((2, num_preys + num_hunters, 2)) ** 20).astype(np.float32)
+        distances = np.empty((2, num_preys, num_hunters), dtype=np.float32)
+        prey_rewards = np.empty(2)
+        kernels.prey_hunter_step(positions, np.zeros((2, num_preys + num_hunters), dtype=np.int64),
+                                 np.zeros(num_preys + num_hunters, dtype=np.float32), num_preys, np.float32(0.0),
+                                 distances, prey_rewards, np.empty(2, dtype=bool))
+        assert np.array_equal(prey_rewards, distances.sum(axis=(1, 2), dtype=np.float64))
@@ -0,0 +1,85 @@
+import argparse
+import time
+
+from stable_baselines3 import A2C, DQN, PPO
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList
+from stable_baselines3.common.monitor import Monitor
+
+from callbacks import PhaseProfilerCallback
+from hunter_prey import PreyHunterEnv
+from hunters import HunterPreyEnv
+from preys import PreyEnv
+from shared_memory_vec_env import SharedMemoryVecEnv
+
+ENVS = {
+    "hunters": HunterPreyEnv,
+    "preys": PreyEnv,
+    "hunters_preys": PreyHunterEnv,
+}
+
+ALGOS = {
+    "dqn": DQN,
+    "a2c": A2C,
+    "ppo": PPO,
+}
+
+
+def make_env(env_name, profile=False, **env_kwargs):
+    """Crear un entorno sin render envuelto en Monitor (para los workers)."""
+    return Monitor(ENVS[env_name](profile=profile, **env_kwargs))
+
+
+class WorkerThroughputCallback(BaseCallback):
+    """Registrar los pasos por segundo de simulación de cada worker en el logger de entrenamiento."""
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        for index, steps_per_second in enumerate(self.training_env.worker_steps_per_second()):
+            self.logger.record(f"workers/steps_per_sec_{index}", steps_per_second)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Entrenar un agente con entornos en procesos paralelos.")
+    parser.add_argument("--env", choices=sorted(ENVS), default="hunters")
+    parser.add_argument("--algo", choices=sorted(ALGOS), default="dqn")
+    parser.add_argument("--workers", type=int, default=4, help="Número de procesos de simulación")
+    parser.add_argument("--timesteps", type=int, default=100000)
+    parser.add_argument("--output", default=None, help="Ruta del modelo guardado (por defecto <env>_<algo>)")
+    parser.add_argument("--profile", action="store_true", help="Medir el tiempo de cada fase del step de los entornos")
+    parser.add_argument("--jit", action="store_true", help="Paso de los entornos compilado con numba (si está instalado)")
+    args = parser.parse_args()
+    if args.algo == "dqn" and args.env == "hunters_preys":
+        parser.error("DQN no soporta el espacio de acciones MultiDiscrete de hunters_preys; usa a2c o ppo")
+    return args
+
+
+def main():
+    args = parse_args()
+    # Los workers copian cada observación a memoria compartida, así que el entorno puede devolver su buffer
+    env = SharedMemoryVecEnv([lambda env_name=args.env: make_env(env_name, args.profile, jit=args.jit, reuse_obs=True)
+                               for _ in range(args.workers)])
+
+    model = ALGOS[args.algo]("MlpPolicy", env, verbose=1)
+    start = time.perf_counter()
+    callbacks = [WorkerThroughputCallback()]
+    if args.profile:
+        callbacks.append(PhaseProfilerCallback())
+    model.learn(total_timesteps=args.timesteps, callback=CallbackList(callbacks))
+    elapsed = time.perf_counter() - start
+
+    model.save(args.output or f"{args.env}_{args.algo}")
+
+    print(f"Total: {model.num_timesteps} pasos en {elapsed:.1f} s ({model.num_timesteps / elapsed:.0f} pasos/s)")
+    for index, steps_per_second in enumerate(env.worker_steps_per_second()):
+        print(f"Worker {index}: {steps_per_second:.0f} pasos/s")
+    if args.profile:
+        stats = PhaseProfilerCallback.merged_stats(env)
+        for name, phase in sorted(stats.items(), key=lambda item: -item[1]["total_s"]):
+            print(f"Fase {name:<14} {phase['total_s']:>8.3f} s {phase['total_s'] / phase['calls'] * 1e6:>8.1f} us/llamada")
+    env.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,81 @@
+import argparse
+
 import pygame
-from stable_baselines3 import DQN
 from hunters import HunterPreyEnv
+from inference_server import PolicyClient, parse_address
+from numpy_policy import NumpyPolicy
+from trajectory import TrajectoryRecorder
+
+# El bucle de paso fijo vive junto al juego, en game/pygame_extension.py
+import game_path  # noqa: F401
+from pygame_extension import FixedTimestepLoop, add_loop_arguments
+
+# Ticks que simula --headless si no se indica --max-ticks
+HEADLESS_MAX_TICKS = 10000
+
+parser = add_loop_arguments(argparse.ArgumentParser(description="Jugar con el hunter entrenado"), 60, 60)
+parser.add_argument("--server", metavar="HOST:PORT", help="Pedir las acciones a inference_server.py en vez de cargar el modelo")
+parser.add_argument("--numpy-policy", metavar="NPZ",
+                    help="Política exportada con numpy_policy.py; juega sin importar torch ni stable_baselines3")
+parser.add_argument("--record", metavar="DIR", help="Grabar la partida en DIR para verla con replay.py")
+parser.add_argument("--max-ticks", type=int, default=None,
+                    help=f"Ticks de simulación antes de salir (con --headless, {HEADLESS_MAX_TICKS} por defecto)")
+args = parser.parse_args()
+
+# Sin ventana no hay evento QUIT que pare el bucle: se para tras un número de ticks
+max_ticks = args.max_ticks if args.max_ticks is not None or not args.headless else HEADLESS_MAX_TICKS
 
-# Inicializar Pygame
-pygame.init()
-screen = pygame.display.set_mode((800, 600))
+# Inicializar Pygame (solo con ventana: pygame.init() captura SIGINT/SIGTERM y sin ventana nadie lee sus eventos)
+if not args.headless:
+    pygame.init()
 
-# Cargar el modelo entrenado
-model = DQN.load("hunter_prey_dqn")  # Cambia el nombre del archivo si es diferente
+# Crear el entorno de juego (la ventana se abre en el primer render; sin ventana en modo headless)
+env = HunterPreyEnv(render_mode=None if args.headless else "human")
+if args.record:
+    env = TrajectoryRecorder(env, args.record)
 
-# Crear el entorno de juego
-env = HunterPreyEnv()
+# Cargar el modelo entrenado (cambia el nombre del archivo si es diferente),
+# o usar el servidor de inferencia compartido entre sesiones
+if args.server:
+    model = PolicyClient(parse_address(args.server), env.observation_space, env.action_space)
+elif args.numpy_policy:
+    model = NumpyPolicy.load(args.numpy_policy)
+else:
+    from stable_baselines3 import DQN  # Solo aquí: importar torch cuesta segundos de arranque
+
+    model = DQN.load("hunter_prey_dqn")
 
 # Reiniciar el entorno para obtener la primera observación
 obs, info = env.reset()
 
-# Crear un reloj para controlar los FPS
-clock = pygame.time.Clock()
-
-# Bucle principal del juego real
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
 
+def update():
+    global obs
     # Obtener la acción predicha por el modelo entrenado
     action, _states = model.predict(obs, deterministic=True)
 
     # Ejecutar la acción en el entorno
     obs, reward, terminated, truncated, info = env.step(action)
 
+    # Reiniciar el entorno si el episodio termina
+    if terminated or truncated:
+        obs, info = env.reset()
+
+
+def render():
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            loop.stop()
+
     # Renderizar el entorno para visualizarlo
     env.render()
 
-    # Limitar la velocidad del bucle a 30 FPS
-    clock.tick(60)
 
-    # Reiniciar el entorno si el episodio termina
-    if terminated or truncated:
-        obs, info = env.reset()
+# Bucle principal del juego real: simulación a tick fijo y render a su propio ritmo
+loop = FixedTimestepLoop(update, render, tick_rate=args.tick_rate, render_rate=args.render_rate,
+                         headless=args.headless)
+loop.run(max_ticks=max_ticks)
 
 # Cerrar Pygame cuando se termine el juego
-pygame.quit()
\ No newline at end of file
+env.close()  # Con --record, escribe los metadatos de la grabación
+pygame.quit()
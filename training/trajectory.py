@@ -0,0 +1,185 @@
+import json
+import os
+
+import gymnasium as gym
+import numpy as np
+
+METADATA_FILE = "trajectory.json"
+
+
+class GrowableMemmap:
+    """Array en disco, mapeado en memoria, al que se le añaden filas y que dobla su tamaño al llenarse.
+
+    El fichero es binario crudo (sin cabecera); forma y tipo se guardan en los metadatos
+    de la trayectoria. close() recorta el fichero a las filas escritas.
+    """
+
+    def __init__(self, path, shape, dtype, capacity=4096):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+        self.length = 0
+        self.capacity = 0
+        self.array = None
+        open(path, "wb").close()
+        self._resize(max(capacity, 1))
+
+    def _resize(self, capacity):
+        if self.array is not None:
+            self.array.flush()
+            self.array = None  # Soltar el mapeo antes de cambiar el tamaño del fichero
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * self.row_bytes)
+        self.capacity = capacity
+        self.array = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, *self.shape))
+
+    def flush(self):
+        self.array.flush()
+
+    def next_row(self):
+        """Reservar la siguiente fila y devolver su índice (se escribe directamente en self.array)."""
+        if self.length == self.capacity:
+            self._resize(self.capacity * 2)
+        self.length += 1
+        return self.length - 1
+
+    def close(self):
+        self.array.flush()
+        self.array = None
+        with open(self.path, "r+b") as f:
+            f.truncate(self.length * self.row_bytes)
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Guardar en disco todo lo que pasa por un entorno para verlo después con replay.py.
+
+    Cada reset y cada step escriben un frame: observación, acción, recompensa, done,
+    inicio de episodio y las posiciones de todos los agentes (env.agent_positions()). Los
+    arrays son memmaps que crecen solos, así que grabar millones de pasos no ocupa memoria.
+
+    Los metadatos se escriben al crear los arrays y se reescriben cuando crecen y cada
+    metadata_every frames: si el proceso muere, Trajectory lee la grabación hasta ese punto
+    (los ficheros sin recortar solo tienen filas de relleno detrás). close() los recorta.
+    """
+
+    def __init__(self, env, directory, capacity=4096, metadata_every=1000):
+        super().__init__(env)
+        self.directory = directory
+        self.capacity = capacity
+        self.metadata_every = metadata_every
+        self.metadata_length = 0
+        self.arrays = None
+        self.layout = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self, positions):
+        # La distribución de las posiciones (grupo -> filas) se fija con el primer frame
+        self.layout = {}
+        count = 0
+        for name, group in positions.items():
+            self.layout[name] = [count, count + len(group)]
+            count += len(group)
+        observation_space, action_space = self.env.observation_space, self.env.action_space
+        specs = {
+            "observations": (observation_space.shape, observation_space.dtype),
+            "actions": (action_space.shape, action_space.dtype),
+            "rewards": ((), np.float32),
+            "dones": ((), np.bool_),
+            "episode_starts": ((), np.bool_),
+            "positions": ((count, 2), np.float32),
+        }
+        self.arrays = {name: GrowableMemmap(os.path.join(self.directory, f"{name}.bin"), shape, dtype, self.capacity)
+                       for name, (shape, dtype) in specs.items()}
+        self._write_metadata()
+
+    def _write_metadata(self):
+        """Guardar los metadatos con las filas ya escritas (escribir y renombrar: nunca quedan a medias)."""
+        self.metadata_length = self.arrays["rewards"].length
+        metadata = {
+            "env": type(self.env.unwrapped).__name__,
+            "length": self.metadata_length,
+            "layout": self.layout,
+            "arrays": {name: {"shape": list(array.shape), "dtype": array.dtype.str}
+                       for name, array in self.arrays.items()},
+        }
+        path = os.path.join(self.directory, METADATA_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def _record(self, obs, action, reward, done, episode_start):
+        positions = self.env.unwrapped.agent_positions()
+        if self.arrays is None:
+            self._open(positions)
+        capacity = self.arrays["rewards"].capacity
+        for array in self.arrays.values():
+            index = array.next_row()
+        arrays = {name: array.array for name, array in self.arrays.items()}
+        arrays["observations"][index] = obs
+        arrays["actions"][index] = action
+        arrays["rewards"][index] = reward
+        arrays["dones"][index] = done
+        arrays["episode_starts"][index] = episode_start
+        for name, (start, stop) in self.layout.items():
+            arrays["positions"][index, start:stop] = positions[name]
+
+        # Al crecer (los ficheros ya se volcaron) o cada metadata_every frames, actualizar la longitud
+        if self.arrays["rewards"].capacity != capacity:
+            self._write_metadata()
+        elif index + 1 - self.metadata_length >= self.metadata_every:
+            for array in self.arrays.values():
+                array.flush()
+            self._write_metadata()
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._record(obs, 0, 0.0, False, True)
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._record(obs, action, reward, terminated or truncated, False)
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        if self.arrays is not None:
+            for array in self.arrays.values():
+                array.flush()
+            self._write_metadata()
+            for array in self.arrays.values():
+                array.close()  # Recorta cada fichero a las filas escritas
+            self.arrays = None
+        super().close()
+
+
+class Trajectory:
+    """Lectura de una trayectoria grabada: memmaps de solo lectura, sin copiar nada a memoria.
+
+    trajectory.rewards[1000:2000], trajectory.positions[123456]... leen directamente del disco.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        self.env = metadata["env"]
+        self.layout = {name: tuple(rows) for name, rows in metadata["layout"].items()}
+        self.length = metadata["length"]
+        for name, spec in metadata["arrays"].items():
+            shape = (self.length, *spec["shape"])
+            array = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=np.dtype(spec["dtype"]), mode="r",
+                              shape=shape) if self.length else np.zeros(shape, dtype=spec["dtype"])
+            setattr(self, name, array)
+        # Índice de los inicios de episodio para saltar entre episodios sin recorrer el fichero
+        self.episode_start_indices = np.flatnonzero(self.episode_starts)
+
+    def __len__(self):
+        return self.length
+
+    def agent_positions(self, index):
+        """Posiciones del frame index agrupadas como en env.agent_positions()."""
+        return {name: self.positions[index, start:stop] for name, (start, stop) in self.layout.items()}
+
+    def episode_of(self, index):
+        """Número de episodio al que pertenece el frame index."""
+        return int(np.searchsorted(self.episode_start_indices, index, side="right")) - 1